@@ -0,0 +1,150 @@
+import argparse
+import os
+import random as rnd
+import statistics
+import time
+from collections import Counter
+from multiprocessing import TimeoutError, get_context
+
+from Game import Game
+from Replay import Replay, ReplayWriter
+from Simulation import DEFAULT_MAX_MOVES, POLICIES, play
+
+STOP_POLL = 0.1  # как часто run_batch проверяет stop, пока процессы играют
+
+
+def play_seeded(task):
+    # кортеж (seed, won, moves, dead) и закодированная партия, если её нужно сохранить
+    seed, row_count, col_count, min_chain_len, policy_name, max_moves, record = task
+    game = Game(row_count, col_count, min_chain_len, seed)
+    result = play(game, POLICIES[policy_name](), rnd.Random(seed), max_moves)
+    return (seed, result.won, result.moves, result.dead), Replay.of(game).encode() if record else None
+
+
+def play_chunk(tasks):
+    return [play_seeded(task) for task in tasks]
+
+
+class BatchReport:
+    def __init__(self, results, elapsed: float, processes: int) -> None:
+        self.results = results  # кортежи (seed, won, moves, dead)
+        self.elapsed = elapsed
+        self.processes = processes
+
+    @property
+    def games(self) -> int:
+        return len(self.results)
+
+    @property
+    def games_per_sec(self) -> float:
+        return self.games / self.elapsed if self.elapsed > 0 else float('inf')
+
+    @property
+    def moves_to_win(self):
+        return sorted(moves for _, won, moves, _ in self.results if won)
+
+    @property
+    def win_rate(self) -> float:
+        return len(self.moves_to_win) / self.games if self.games else 0.0
+
+    @property
+    def dead_rate(self) -> float:
+        return sum(1 for *_, dead in self.results if dead) / self.games if self.games else 0.0
+
+    def distribution(self, bucket: int = 5):
+        # гистограмма числа ходов до победы с шагом bucket
+        return sorted(Counter(moves // bucket * bucket for moves in self.moves_to_win).items())
+
+    def __str__(self) -> str:
+        lines = ['{} games in {:.2f}s on {} process(es): {:.1f} games/s'.format(
+            self.games, self.elapsed, self.processes, self.games_per_sec),
+            'win rate {:.1%}, dead boards {:.1%}'.format(self.win_rate, self.dead_rate)]
+        moves = self.moves_to_win
+        if moves:
+            deciles = statistics.quantiles(moves, n=10) if len(moves) > 1 else moves * 9
+            lines.append('moves to win: min {}, median {}, mean {:.1f}, p90 {:.0f}, max {}'.format(
+                moves[0], statistics.median(moves), statistics.mean(moves), deciles[-1], moves[-1]))
+            for start, count in self.distribution():
+                lines.append('  {:>4}-{:<4} {:>6}'.format(start, start + 4, count))
+        return '\n'.join(lines)
+
+
+def run_batch(count: int, row_count: int = Game.START_ROW_COUNT, col_count: int = Game.START_COL_COUNT,
+              min_chain_len: int = Game.START_MINIMUM_CHAIN_LENGTH, policy: str = 'greedy',
+              seed: int = 0, processes: int = None, max_moves: int = DEFAULT_MAX_MOVES,
+              replay: ReplayWriter = None, stop=None, start_method: str = None) -> BatchReport:
+    # replay - куда записать все партии в порядке зёрен; stop - threading.Event, по которому прогон
+    # прерывается, а процессы завершаются: в отчёте тогда меньше count партий.
+    # start_method - способ запуска процессов ('spawn' для многопоточного процесса), по умолчанию системный
+    processes = processes or os.cpu_count() or 1
+    tasks = [(seed + i, row_count, col_count, min_chain_len, policy, max_moves, replay is not None)
+             for i in range(count)]
+    start = time.perf_counter()
+    played = list()
+    if processes == 1:
+        for task in tasks:
+            if stop is not None and stop.is_set():
+                break
+            played.append(play_seeded(task))
+    else:
+        # пачки партий отдаются по одной, чтобы ожидание результата можно было прервать по stop
+        size = max(1, count // (processes * 8))
+        chunks = [tasks[i:i + size] for i in range(0, count, size)]
+        with get_context(start_method).Pool(processes) as pool:
+            results = pool.imap_unordered(play_chunk, chunks)
+            while len(played) < count and not (stop is not None and stop.is_set()):
+                try:
+                    played.extend(results.next(STOP_POLL))
+                except TimeoutError:
+                    pass
+    played.sort(key=lambda item: item[0])
+    if replay is not None:
+        for _, data in played:
+            replay.write_encoded(data)
+    return BatchReport([result for result, _ in played], time.perf_counter() - start, processes)
+
+
+def scaling(count: int, max_processes: int = None, **kwargs):
+    # пропускная способность при 1, 2, 4, ... процессах
+    max_processes = max_processes or os.cpu_count() or 1
+    processes, reports = 1, list()
+    while True:
+        reports.append(run_batch(count, processes=processes, **kwargs))
+        if processes >= max_processes:
+            return reports
+        processes = min(processes * 2, max_processes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пакетный прогон игр без интерфейса')
+    parser.add_argument('-n', '--games', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=Game.START_ROW_COUNT)
+    parser.add_argument('--cols', type=int, default=Game.START_COL_COUNT)
+    parser.add_argument('--min-chain-len', type=int, default=Game.START_MINIMUM_CHAIN_LENGTH)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='greedy')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-moves', type=int, default=DEFAULT_MAX_MOVES)
+    parser.add_argument('-j', '--processes', type=int, default=None)
+    parser.add_argument('--scaling', action='store_true', help='сравнить 1, 2, 4, ... процессов')
+    parser.add_argument('--replay', metavar='PATH', help='сохранить все партии в файл (см. Replay.py)')
+    args = parser.parse_args()
+
+    kwargs = dict(row_count=args.rows, col_count=args.cols, min_chain_len=args.min_chain_len,
+                  policy=args.policy, seed=args.seed, max_moves=args.max_moves)
+    if args.scaling:
+        reports = scaling(args.games, args.processes, **kwargs)
+        base = reports[0].games_per_sec
+        for report in reports:
+            speedup = report.games_per_sec / base
+            print('{:>3} processes: {:>9.1f} games/s, speedup {:.2f}, efficiency {:.0%}'.format(
+                report.processes, report.games_per_sec, speedup, speedup / report.processes))
+        print(reports[-1])
+    elif args.replay:
+        with open(args.replay, 'wb') as f:
+            print(run_batch(args.games, processes=args.processes, replay=ReplayWriter(f), **kwargs))
+    else:
+        print(run_batch(args.games, processes=args.processes, **kwargs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+import argparse
+import multiprocessing
+import random as rnd
+import threading
+import time
+from collections import deque
+
+from Game import Game, GameRandom
+from Simulation import GreedyKnightPolicy, play
+from Solver import Solver, SolveStatus
+
+DEFAULT_MAX_MOVES = 8
+DEFAULT_POOL_SIZE = 8
+GENERATOR_MAX_NODES = 500  # узлов Solver на одно поле: поле, которое не удалось проверить, просто пропускается
+MAX_REJECTIONS = 20  # после стольких отвергнутых подряд зёрен конфигурация больше не генерируется
+POLL_INTERVAL = 0.1  # как часто поток пула проверяет stop, пока процесс проверяет поле
+
+
+class BoardSpec:
+    # поле задаётся зерном: Game(row_count, col_count, min_chain_len, seed) воспроизводит его
+    # вместе со всей досыпкой, поэтому найденный выигрыш - проверка именно этой партии
+    __slots__ = ('seed', 'moves', 'exact')
+
+    def __init__(self, seed: int, moves: int, exact: bool) -> None:
+        self.seed = seed
+        self.moves = moves  # длина найденного выигрыша
+        self.exact = exact  # True - кратчайший выигрыш, доказанный полным перебором Solver, False - оценка сверху
+
+    def __str__(self) -> str:
+        return 'seed = {}, moves = {}{}'.format(self.seed, '' if self.exact else '<=', self.moves)
+
+
+class BoardGenerator:
+    # перебирает случайные зёрна и оставляет поля, выигрываемые не более чем за max_moves ходов;
+    # difficulty = (от, до) ограничивает длину выигрыша, exact - считать её точно через Solver,
+    # а не оценкой сверху от жадной игры с той же досыпкой
+    def __init__(self, row_count: int, col_count: int, min_chain_len: int, max_moves: int = DEFAULT_MAX_MOVES,
+                 difficulty=None, exact: bool = False, max_nodes: int = GENERATOR_MAX_NODES) -> None:
+        self.row_count = row_count
+        self.col_count = col_count
+        self.min_chain_len = min_chain_len
+        self.max_moves = max_moves
+        self.difficulty = difficulty
+        self.exact = exact
+        self._solver = Solver(max_depth=max_moves, max_nodes=max_nodes)
+        self.tried = 0
+        self.accepted = 0
+        self.elapsed = 0.0
+
+    @property
+    def config(self):
+        return self.row_count, self.col_count, self.min_chain_len
+
+    @property
+    def boards_per_sec(self) -> float:
+        return self.accepted / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def acceptance(self) -> float:
+        return self.accepted / self.tried if self.tried else 0.0
+
+    def _fits(self, moves: int) -> bool:
+        if moves > self.max_moves:
+            return False
+        return self.difficulty is None or self.difficulty[0] <= moves <= self.difficulty[1]
+
+    def check(self, seed: int):
+        # BoardSpec, если поле подходит, иначе None. Жадная игра дешёвая и даёт оценку сверху;
+        # Solver нужен, когда она проиграла или когда требуется точная длина выигрыша. Выигрыш жадной
+        # игры остаётся в силе, даже если Solver не уложился в бюджет или перебрал ходы не полностью
+        game = Game(self.row_count, self.col_count, self.min_chain_len, seed)
+        played = play(game.copy(), GreedyKnightPolicy(), rnd.Random(seed), self.max_moves)
+        if played.won and not self.exact:
+            return BoardSpec(seed, played.moves, False) if self._fits(played.moves) else None
+        self._solver.max_depth = played.moves if played.won else self.max_moves
+        result = self._solver.solve(game)
+        if result.status == SolveStatus.SOLVED:
+            return BoardSpec(seed, result.moves, result.exact) if self._fits(result.moves) else None
+        if played.won:
+            return BoardSpec(seed, played.moves, False) if self._fits(played.moves) else None
+        return None
+
+    def count(self, spec, elapsed: float) -> None:
+        # итог проверки, сделанной не через generate (в процессе BoardPool)
+        self.tried += 1
+        self.accepted += spec is not None
+        self.elapsed += elapsed
+
+    def generate(self, attempts: int = None, stop: threading.Event = None):
+        # следующее подходящее поле или None, если за attempts попыток не нашлось
+        start, tried = time.perf_counter(), 0
+        try:
+            while attempts is None or tried < attempts:
+                if stop is not None and stop.is_set():
+                    return None
+                tried += 1
+                spec = self.check(GameRandom.make_seed())
+                if spec is not None:
+                    self.accepted += 1
+                    return spec
+            return None
+        finally:
+            self.tried += tried
+            self.elapsed += time.perf_counter() - start
+
+
+def check_seed(task):
+    # проверка одного зерна в процессе генерации BoardPool
+    config, max_moves, difficulty, seed = task
+    return BoardGenerator(*config, max_moves, difficulty).check(seed)
+
+
+def default_max_moves(row_count: int) -> int:
+    # на высоком поле рыцарю дольше опускаться
+    return max(DEFAULT_MAX_MOVES, row_count)
+
+
+class BoardPool:
+    # готовые поля по конфигурациям (row_count, col_count, min_chain_len); take() никогда не ждёт
+    # генерации и при пустом пуле возвращает None. Пополняется только последняя запрошенная конфигурация:
+    # фоновый поток отдаёт зёрна на проверку отдельному процессу, чтобы не отнимать GIL у интерфейса.
+    # После MAX_REJECTIONS отвергнутых подряд зёрен конфигурация больше не генерируется.
+    # max_moves=None - своё ограничение для каждой конфигурации, см. default_max_moves
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, max_moves: int = None, difficulty=None) -> None:
+        self.size = size
+        self.max_moves = max_moves
+        self.difficulty = difficulty
+        self._boards = dict()  # конфигурация -> deque из BoardSpec
+        self._generators = dict()
+        self._rejections = dict()  # конфигурация -> отвергнутых подряд зёрен
+        self._wanted = None  # конфигурация, которую сейчас пополняет поток
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def prefill(self, row_count: int, col_count: int, min_chain_len: int) -> None:
+        # начать заполнять пул конфигурации вместо прежней; готовые поля прежних остаются
+        config = (row_count, col_count, min_chain_len)
+        with self._condition:
+            if config not in self._boards:
+                self._boards[config] = deque()
+                max_moves = self.max_moves or default_max_moves(row_count)
+                self._generators[config] = BoardGenerator(*config, max_moves, self.difficulty)
+                self._rejections[config] = 0
+            self._wanted = config
+            self._condition.notify_all()
+
+    def take(self, row_count: int, col_count: int, min_chain_len: int):
+        # BoardSpec из пула или None; пул конфигурации тут же начинает пополняться
+        self.prefill(row_count, col_count, min_chain_len)
+        with self._condition:
+            boards = self._boards[row_count, col_count, min_chain_len]
+            if boards:
+                self.hits += 1
+                spec = boards.popleft()
+            else:
+                self.misses += 1
+                spec = None
+            self._condition.notify_all()
+        return spec
+
+    def ready(self, row_count: int, col_count: int, min_chain_len: int) -> int:
+        with self._condition:
+            return len(self._boards.get((row_count, col_count, min_chain_len), ()))
+
+    def gave_up(self, row_count: int, col_count: int, min_chain_len: int) -> bool:
+        # для конфигурации подходящие поля не находятся, генерация остановлена
+        with self._condition:
+            return self._rejections.get((row_count, col_count, min_chain_len), 0) >= MAX_REJECTIONS
+
+    def _next_config(self):
+        config = self._wanted
+        if config is None or len(self._boards[config]) >= self.size or self._rejections[config] >= MAX_REJECTIONS:
+            return None
+        return config
+
+    def _run(self) -> None:
+        # spawn, а не fork: процесс интерфейса многопоточный
+        pool = None
+        try:
+            while not self._stop.is_set():
+                with self._condition:
+                    config = self._next_config()
+                    while config is None and not self._stop.is_set():
+                        self._condition.wait()
+                        config = self._next_config()
+                    generator = self._generators.get(config)
+                if generator is None:
+                    return
+                if pool is None:
+                    pool = multiprocessing.get_context('spawn').Pool(1)
+                # по одной попытке за раз: запрос другой конфигурации не ждёт, пока найдётся поле
+                start = time.perf_counter()
+                task = (config, generator.max_moves, generator.difficulty, GameRandom.make_seed())
+                result = pool.apply_async(check_seed, (task,))
+                while not result.ready():
+                    if self._stop.is_set():
+                        return
+                    result.wait(POLL_INTERVAL)
+                spec = result.get()
+                generator.count(spec, time.perf_counter() - start)
+                with self._condition:
+                    if spec is None:
+                        self._rejections[config] += 1
+                    else:
+                        self._rejections[config] = 0
+                        self._boards[config].append(spec)
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> str:
+        lines = ['pool hits {}, misses {}, hit rate {:.1%}'.format(self.hits, self.misses, self.hit_rate)]
+        with self._condition:
+            items = [(config, len(self._boards[config]), self._generators[config], self._rejections[config])
+                     for config in self._boards]
+            wanted = self._wanted
+        for config, ready, generator, rejections in items:
+            line = '  {}x{}/{}: {} ready, {} tried, {:.0%} accepted, {:.1f} boards/s'.format(
+                *config, ready, generator.tried, generator.acceptance, generator.boards_per_sec)
+            if rejections >= MAX_REJECTIONS:
+                line += ', gave up after {} rejections in a row'.format(rejections)
+            elif config == wanted and ready < self.size:
+                line += ', generating'
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генерация полей, выигрываемых за ограниченное число ходов')
+    parser.add_argument('-n', '--boards', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=Game.START_ROW_COUNT)
+    parser.add_argument('--cols', type=int, default=Game.START_COL_COUNT)
+    parser.add_argument('--min-chain-len', type=int, default=Game.START_MINIMUM_CHAIN_LENGTH)
+    parser.add_argument('--max-moves', type=int, default=DEFAULT_MAX_MOVES)
+    parser.add_argument('--difficulty', type=int, nargs=2, metavar=('MIN', 'MAX'), default=None)
+    parser.add_argument('--exact', action='store_true', help='точная длина выигрыша через Solver')
+    args = parser.parse_args()
+
+    generator = BoardGenerator(args.rows, args.cols, args.min_chain_len, args.max_moves, args.difficulty,
+                               args.exact)
+    for _ in range(args.boards):
+        print(generator.generate())
+    print('{} tried, {:.0%} accepted, {:.1f} boards/s'.format(
+        generator.tried, generator.acceptance, generator.boards_per_sec))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from BatchRunner import run_batch
+from Game import Game
+
+RULES_VERSION = 1  # увеличить при изменении правил: старые оценки перестанут использоваться
+POLICY = 'greedy'
+CALIBRATION_SEED = 1 << 40  # зёрна калибровки не пересекаются с зёрнами BatchRunner по умолчанию
+CACHE_FILE = os.path.join(os.path.expanduser('~'), '.gemstone_castle', 'calibration.json')
+TARGET_GAMES = 256  # после стольких партий оценка конфигурации считается готовой
+FIRST_BATCH = 8  # фоновое уточнение идёт пачками 8, 16, 32, ... партий
+MAX_MOVES = 300  # дольше жадный игрок на больших полях почти не выигрывает
+# партии в фоне играют отдельные процессы, а не поток интерфейса; не меньше двух, иначе run_batch
+# играет в вызывающем процессе
+SERVICE_PROCESSES = max(2, (os.cpu_count() or 1) - 1)
+
+# подписи сложности по доле выигрышей жадного игрока
+LEVELS = ((0.9, 'лёгкая'), (0.6, 'средняя'), (0.3, 'трудная'), (0.0, 'очень трудная'))
+
+
+class Calibration:
+    # итоги партий одной конфигурации; суммы, а не средние, чтобы новые партии просто добавлялись
+    __slots__ = ('games', 'wins', 'win_moves', 'dead')
+
+    def __init__(self, games: int = 0, wins: int = 0, win_moves: int = 0, dead: int = 0) -> None:
+        self.games = games
+        self.wins = wins
+        self.win_moves = win_moves  # сумма ходов в выигранных партиях
+        self.dead = dead  # партии, в которых кончились ходы
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def expected_moves(self):
+        return self.win_moves / self.wins if self.wins else None
+
+    @property
+    def dead_rate(self) -> float:
+        return self.dead / self.games if self.games else 0.0
+
+    @property
+    def label(self) -> str:
+        return next(label for level, label in LEVELS if self.win_rate >= level)
+
+    def add(self, report) -> None:
+        # report - BatchReport из BatchRunner
+        won = report.moves_to_win
+        self.games += report.games
+        self.wins += len(won)
+        self.win_moves += sum(won)
+        self.dead += sum(1 for *_, dead in report.results if dead)
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __str__(self) -> str:
+        moves = self.expected_moves
+        return '{}: win rate {:.0%}, moves {}, dead boards {:.0%} ({} games)'.format(
+            self.label, self.win_rate, '-' if moves is None else '{:.1f}'.format(moves), self.dead_rate, self.games)
+
+
+class CalibrationTable:
+    # оценки по конфигурациям (row_count, col_count, min_chain_len) в JSON-файле;
+    # файл другой версии правил или политики не читается
+    def __init__(self, path: str = CACHE_FILE) -> None:
+        self.path = path
+        self._entries = dict()
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def _key(config) -> str:
+        return 'x'.join(str(n) for n in config)
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding='UTF-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('rules_version') != RULES_VERSION or data.get('policy') != POLICY:
+            return
+        with self._lock:
+            self._entries = {key: Calibration(**value) for key, value in data.get('entries', {}).items()}
+
+    def save(self) -> None:
+        with self._lock:
+            data = {'rules_version': RULES_VERSION, 'policy': POLICY,
+                    'entries': {key: entry.as_dict() for key, entry in sorted(self._entries.items())}}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='UTF-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def get(self, config):
+        with self._lock:
+            return self._entries.get(self._key(config))
+
+    def refine(self, config, games: int, processes: int = 1, stop=None, start_method: str = None):
+        # ещё games партий; зёрна продолжают уже сыгранные, так что оценка воспроизводима.
+        # Прерванная по stop пачка не учитывается, тогда возвращается None
+        entry = self.get(config) or Calibration()
+        row_count, col_count, min_chain_len = config
+        report = run_batch(games, row_count, col_count, min_chain_len, POLICY,
+                           CALIBRATION_SEED + entry.games, processes, MAX_MOVES, stop=stop, start_method=start_method)
+        if report.games < games:
+            return None
+        with self._lock:
+            entry = self._entries.setdefault(self._key(config), entry)
+            entry.add(report)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CalibrationService(QObject):
+    # фоновое уточнение оценок для интерфейса: уточняется только конфигурация последнего request(),
+    # пока её не отменят через cancel(). Партии играют процессы SERVICE_PROCESSES; смена конфигурации,
+    # cancel() и stop() прерывают текущую пачку. Каждая сыгранная пачка сохраняется в файл
+    # и сообщается сигналом calibrated(config, Calibration)
+    calibrated = pyqtSignal(object, object)
+
+    def __init__(self, table: CalibrationTable = None, target: int = TARGET_GAMES,
+                 processes: int = SERVICE_PROCESSES, parent=None) -> None:
+        super().__init__(parent)
+        self.table = table if table is not None else CalibrationTable()
+        self.target = target
+        self.processes = processes
+        self._wanted = None
+        self._cancel = threading.Event()  # прерывает пачку, которая сейчас играется
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self, config):
+        return self.table.get(config)
+
+    def request(self, config) -> None:
+        # уточнять config вместо прежней конфигурации
+        config = tuple(config)
+        entry = self.table.get(config)
+        if entry is not None and entry.games >= self.target:
+            self.cancel()
+            return
+        with self._condition:
+            if config != self._wanted:
+                self._cancel.set()
+            self._wanted = config
+            self._condition.notify_all()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def cancel(self) -> None:
+        # больше ничего не уточнять, текущая пачка прерывается
+        with self._condition:
+            self._wanted = None
+            self._cancel.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.cancel()
+        with self._condition:
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._wanted is None and not self._stop.is_set():
+                    self._condition.wait()
+                if self._stop.is_set():
+                    return
+                config = self._wanted
+                cancel = self._cancel = threading.Event()
+            entry = self.table.get(config)
+            done = entry.games if entry is not None else 0
+            entry = self.table.refine(config, min(max(FIRST_BATCH, done), self.target - done), self.processes,
+                                      cancel, 'spawn')
+            if entry is None:
+                continue  # пачка прервана
+            self.table.save()
+            with self._condition:
+                if entry.games >= self.target and config == self._wanted:
+                    self._wanted = None
+            self.calibrated.emit(config, entry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Оценка сложности конфигураций поля по партиям жадного игрока')
+    parser.add_argument('--rows', type=int, nargs='+', default=[Game.START_ROW_COUNT])
+    parser.add_argument('--cols', type=int, nargs='+', default=[Game.START_COL_COUNT])
+    parser.add_argument('--min-chain-len', type=int, nargs='+', default=[Game.START_MINIMUM_CHAIN_LENGTH])
+    parser.add_argument('-n', '--games', type=int, default=TARGET_GAMES, help='довести число партий до N')
+    parser.add_argument('-j', '--processes', type=int, default=None)
+    parser.add_argument('--cache', default=CACHE_FILE)
+    args = parser.parse_args()
+
+    table = CalibrationTable(args.cache)
+    for row_count in args.rows:
+        for col_count in args.cols:
+            for min_chain_len in args.min_chain_len:
+                config = (row_count, col_count, min_chain_len)
+                entry = table.get(config)
+                missing = args.games - (entry.games if entry is not None else 0)
+                if missing > 0:
+                    entry = table.refine(config, missing, args.processes)
+                    table.save()
+                print('{}x{}/{} {}'.format(row_count, col_count, min_chain_len, entry))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,14 @@
 import copy
 import random as rnd
+from bisect import bisect_right
+from collections import OrderedDict, deque
 from enum import Enum
-from typing import Tuple
+from typing import Dict, List, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class CellContents(Enum):
@@ -42,41 +49,580 @@ class Cell:
         return 'Contents = {}'.format(self.contents)
 
 
+_CONTENTS = tuple(CellContents)  # CellContents по значению без вызова Enum
+_UNMATCHED = frozenset((CellContents.EMPTY.value, CellContents.KNIGHT.value, CellContents.PRINCESS.value))
+
+
+class CellView:
+    # лёгкое представление клетки поверх буферов Board, повторяет интерфейс Cell
+    __slots__ = ('_contents', '_active', '_dirty', '_index')
+
+    def __init__(self, contents: bytearray, active: bytearray, dirty: set, index: int) -> None:
+        self._contents = contents
+        self._active = active
+        self._dirty = dirty
+        self._index = index
+
+    def get_contents(self) -> CellContents:
+        return _CONTENTS[self._contents[self._index]]
+
+    def set_contents(self, value):
+        self._contents[self._index] = value.value
+        self._dirty.add(self._index)
+
+    def get_active(self) -> bool:
+        return self._active[self._index] != 0
+
+    def set_active(self, value):
+        self._active[self._index] = 1 if value else 0
+        self._dirty.add(self._index)
+
+    contents = property(get_contents, set_contents)
+    is_active = property(get_active, set_active)
+
+    def __str__(self) -> str:
+        return 'Contents = {}'.format(self.contents)
+
+
+class ColumnDrop:
+    # как осыпается один столбец: какие строки очищены, куда падают уцелевшие клетки
+    # и какие новые клетки появляются сверху
+    # план хранится в истории ходов каждой партии, поэтому в нём только то, из чего осыпание не вывести
+    __slots__ = ('col', 'empty_rows', 'cleared', 'refills')
+
+    def __init__(self, col: int, empty_rows: List[int], cleared: bytes, refills: bytes) -> None:
+        self.col = col
+        self.empty_rows = tuple(empty_rows)  # по возрастанию
+        self.cleared = cleared  # что лежало в очищенных клетках, нужно для отмены хода
+        self.refills = refills  # refills[k] появляется в строке 0 на k-м шаге анимации
+
+    @property
+    def moves(self) -> List[Tuple[int, int]]:
+        # пары (откуда, куда) для уцелевших клеток, снизу вверх
+        moves, empty_rows = list(), self.empty_rows
+        shift, k = 0, len(empty_rows) - 1
+        for r in range(empty_rows[-1], -1, -1):
+            if k >= 0 and empty_rows[k] == r:
+                shift += 1
+                k -= 1
+            else:
+                moves.append((r, r + shift))
+        return moves
+
+    def final_row(self, row: int) -> int:
+        # строка, в которую упадёт неочищенная клетка из строки row
+        return row + len(self.empty_rows) - bisect_right(self.empty_rows, row)
+
+    @property
+    def depth(self) -> int:
+        # сколько верхних строк столбца меняется
+        return self.empty_rows[-1] + 1
+
+    def falls(self) -> List['CellFall']:
+        # пути клеток, которые окажутся в строках 0..depth-1, сверху вниз; клетка, падающая на shift строк,
+        # ждёт, пока не закроются пустые строки ниже неё, и приземляется вместе со всем столбцом на шаге len(self)
+        n = len(self.empty_rows)
+        falls = [CellFall(r - n, r, 0) for r in range(n)]
+        falls.extend(CellFall(from_row, to_row, n - (to_row - from_row)) for from_row, to_row in reversed(self.moves))
+        return falls
+
+    def __len__(self) -> int:
+        return len(self.empty_rows)
+
+
+class CellFall:
+    # путь одной клетки при осыпании: из start_row в end_row по строке за шаг, начиная с шага delay;
+    # новые клетки начинают выше поля (start_row < 0)
+    __slots__ = ('start_row', 'end_row', 'delay')
+
+    def __init__(self, start_row: int, end_row: int, delay: int) -> None:
+        self.start_row = start_row
+        self.end_row = end_row
+        self.delay = delay
+
+    def row_at(self, t: float) -> float:
+        # дробная строка в момент t, t - в шагах осыпания
+        return self.start_row + min(max(t - self.delay, 0.0), self.end_row - self.start_row)
+
+
+class DropPlan:
+    # план осыпания поля после удаления цепочки, затрагивает только её столбцы
+    __slots__ = ('_columns', '_steps')
+
+    def __init__(self, columns: Dict[int, ColumnDrop]) -> None:
+        self._columns = columns
+        self._steps = max((len(d) for d in columns.values()), default=0)
+
+    @property
+    def columns(self) -> Dict[int, ColumnDrop]:
+        return self._columns
+
+    @property
+    def steps(self) -> int:
+        return self._steps
+
+    def __iter__(self):
+        return iter(self._columns.values())
+
+    def falls(self) -> Dict[int, List[CellFall]]:
+        return {c: drop.falls() for c, drop in self._columns.items()}
+
+
+class FallAnimation:
+    # положения падающих клеток во времени, считаются один раз на кадр. Поле уже в конечном состоянии:
+    # клетка рисуется по содержимому строки end_row в дробной строке row_at(t)
+    def __init__(self, plan: DropPlan) -> None:
+        self._falls = plan.falls()
+        self._steps = plan.steps
+        self._depths = {c: falls[-1].end_row + 1 for c, falls in self._falls.items()}
+        self._rows = {c: [fall.start_row for fall in falls] for c, falls in self._falls.items()}
+        self._time = 0.0
+
+    @property
+    def steps(self) -> int:
+        return self._steps
+
+    @property
+    def time(self) -> float:
+        return self._time
+
+    @property
+    def done(self) -> bool:
+        return self._time >= self._steps
+
+    @property
+    def depths(self) -> Dict[int, int]:
+        # столбец -> сколько его верхних строк занимает анимация
+        return self._depths
+
+    def cells(self) -> List[Tuple[int, int]]:
+        # все клетки, которые анимация может занять
+        return [(r, c) for c, depth in self._depths.items() for r in range(depth)]
+
+    def advance(self, t: float) -> List[Tuple[int, int]]:
+        # переводит анимацию в момент t; возвращает клетки, которые клетки-фигуры задели, сдвинувшись
+        t = min(t, self._steps)
+        self._time, dirty = t, set()
+        for c, falls in self._falls.items():
+            rows = self._rows[c]
+            for i, fall in enumerate(falls):
+                old, new = rows[i], fall.row_at(t)
+                if old != new:
+                    rows[i] = new
+                    dirty.update((r, c) for r in range(max(int(old), 0), min(int(new) + 2, fall.end_row + 1)))
+        return sorted(dirty)
+
+    def covering(self, rc: Tuple[int, int]):
+        # падающие клетки, задевающие клетку rc, парами (end_row, дробная строка),
+        # или None, если клетка не участвует в анимации
+        r, c = rc
+        if r >= self._depths.get(c, 0):
+            return None
+        rows, falls = self._rows[c], self._falls[c]
+        i, found = bisect_right(rows, r - 1), list()
+        while i < len(rows) and rows[i] < r + 1:
+            found.append((falls[i].end_row, rows[i]))
+            i += 1
+        return found
+
+
+class Chain:
+    # упорядоченная цепочка выделенных клеток: список для порядка и словарь позиций
+    # для проверки принадлежности, добавление и снятие последней клетки за O(1)
+    __slots__ = ('_cells', '_positions')
+
+    def __init__(self, cells=()) -> None:
+        self._cells = list()
+        self._positions = dict()
+        for rc in cells:
+            self.append(rc)
+
+    def append(self, rc: Tuple[int, int]) -> None:
+        self._positions[rc] = len(self._cells)
+        self._cells.append(rc)
+
+    def pop(self) -> Tuple[int, int]:
+        rc = self._cells.pop()
+        del self._positions[rc]
+        return rc
+
+    def index(self, rc: Tuple[int, int]) -> int:
+        return self._positions[rc]
+
+    @property
+    def last(self):
+        return self._cells[-1] if self._cells else None
+
+    @property
+    def previous(self):
+        return self._cells[-2] if len(self._cells) >= 2 else None
+
+    def __contains__(self, rc) -> bool:
+        return rc in self._positions
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __iter__(self):
+        return iter(self._cells)
+
+    def __getitem__(self, i):
+        return self._cells[i]
+
+    def __str__(self) -> str:
+        return 'Chain = {}'.format(self._cells)
+
+
+_MOD3 = bytes(i % 3 for i in range(256))  # байт 255 отбрасывается, остальные 255 значений делятся на 3 поровну
+
+
+class BlockCache:
+    # общий кэш блоков для многих GameRandom, например для сессий сервера: ключ - (seed, номер блока),
+    # при переполнении вытесняется блок, к которому дольше всего не обращались
+    def __init__(self, capacity: int) -> None:
+        self._capacity = capacity
+        self._blocks = OrderedDict()
+
+    def get(self, key):
+        block = self._blocks.get(key)
+        if block is not None:
+            self._blocks.move_to_end(key)
+        return block
+
+    def put(self, key, block: bytes) -> None:
+        self._blocks[key] = block
+        if len(self._blocks) > self._capacity:
+            self._blocks.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+
+class GameRandom:
+    # воспроизводимый источник содержимого клеток: значение с номером position зависит
+    # только от seed и position, поэтому копия игры продолжает ту же последовательность,
+    # а генерация идёт блоками по BLOCK значений
+    BLOCK = 4096
+    CACHE_BLOCKS = 64
+    USE_NUMPY = False  # у NumPy своя последовательность, игры с ним и без него не совпадают
+
+    def __init__(self, seed: int = None, position: int = 0, use_numpy: bool = None,
+                 cache: BlockCache = None) -> None:
+        if seed is not None and seed < 0:
+            raise ValueError('seed must not be negative: {}'.format(seed))  # в файле партий зерно - varint
+        self._seed = self.make_seed() if seed is None else seed
+        self._position = position
+        self._use_numpy = (self.USE_NUMPY if use_numpy is None else use_numpy) and numpy is not None
+        self._blocks = dict()
+        self._cache = cache  # общий кэш вместо собственного _blocks
+
+    @staticmethod
+    def make_seed() -> int:
+        return rnd.SystemRandom().getrandbits(63)
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def position(self) -> int:
+        return self._position
+
+    def _generate(self, b: int) -> bytes:
+        if self._use_numpy:
+            return numpy.random.default_rng([self._seed, b]).integers(0, 3, self.BLOCK, numpy.uint8).tobytes()
+        rng, data = rnd.Random((self._seed << 32) | b), bytearray()
+        while len(data) < self.BLOCK:
+            data += rng.getrandbits(8 * self.BLOCK).to_bytes(self.BLOCK, 'little').translate(_MOD3, b'\xff')
+        return bytes(data[:self.BLOCK])
+
+    def _block(self, b: int) -> bytes:
+        if self._cache is not None:
+            key = (self._seed, b)
+            block = self._cache.get(key)
+            if block is None:
+                block = self._generate(b)
+                self._cache.put(key, block)
+            return block
+        block = self._blocks.get(b)
+        if block is not None:
+            return block
+        block = self._generate(b)
+        if len(self._blocks) >= self.CACHE_BLOCKS:
+            del self._blocks[next(iter(self._blocks))]
+        self._blocks[b] = block
+        return block
+
+    def values(self, position: int, count: int) -> bytes:
+        result = bytearray()
+        while count > 0:
+            b, offset = divmod(position, self.BLOCK)
+            chunk = self._block(b)[offset:offset + count]
+            result += chunk
+            position += len(chunk)
+            count -= len(chunk)
+        return bytes(result)
+
+    def seek(self, position: int) -> None:
+        self._position = position
+
+    def contents(self, count: int) -> bytes:
+        result = self.values(self._position, count)
+        self._position += count
+        return result
+
+    def copy(self, shared_cache: bool = True) -> 'GameRandom':
+        # кэш блоков общий, блоки неизменяемы; копии для другого потока нужен свой кэш
+        random = copy.copy(self)
+        if not shared_cache:
+            random._blocks = dict(self._blocks)
+            random._cache = None
+        return random
+
+
+class Board:
+    # поле хранится в двух плоских буферах, клетка (r, c) лежит по индексу r * col_count + c;
+    # буферы не пересоздаются, поэтому CellView может держать ссылки на них.
+    # Индексы изменённых клеток копятся в _dirty до вызова take_dirty(); если их больше четверти поля,
+    # помечается всё поле - иначе в партиях без интерфейса, где take_dirty() не вызывают, набор рос бы до размера поля
+
+    def __init__(self, row_count: int, col_count: int, contents=None) -> None:
+        self._row_count = row_count
+        self._col_count = col_count
+        size = row_count * col_count
+        if contents is None:
+            self._contents = bytearray([CellContents.EMPTY.value]) * size
+        else:
+            self._contents = bytearray(contents)
+        self._active = bytearray(size)
+        self._dirty = set()
+        self._dirty_all = True
+        self._dirty_limit = size // 4
+
+    @property
+    def row_count(self) -> int:
+        return self._row_count
+
+    @property
+    def col_count(self) -> int:
+        return self._col_count
+
+    @property
+    def contents_buffer(self) -> bytearray:
+        return self._contents
+
+    @property
+    def active_buffer(self) -> bytearray:
+        return self._active
+
+    def index(self, rc: Tuple[int, int]) -> int:
+        return rc[0] * self._col_count + rc[1]
+
+    def fill(self, values) -> None:
+        self._contents[:] = values
+        self._dirty_all = True
+
+    def mark_dirty(self, index: int) -> None:
+        if not self._dirty_all:
+            self._dirty.add(index)
+
+    def _mark_column(self, c: int, depth: int) -> None:
+        if self._dirty_all:
+            return
+        self._dirty.update(range(c, depth * self._col_count, self._col_count))
+        if len(self._dirty) > self._dirty_limit:
+            self._dirty_all = True
+            self._dirty.clear()
+
+    def take_dirty(self):
+        # индексы клеток, изменённых с прошлого вызова, или None, если изменилось всё поле
+        dirty = None if self._dirty_all else sorted(self._dirty)
+        self._dirty = set()
+        self._dirty_all = False
+        return dirty
+
+    def copy(self) -> 'Board':
+        board = Board(self._row_count, self._col_count, self._contents)
+        board._active[:] = self._active
+        return board
+
+    def __getitem__(self, indices: Tuple[int, int]) -> CellView:
+        return CellView(self._contents, self._active, self._dirty, indices[0] * self._col_count + indices[1])
+
+    def drop_plan(self, cells, refill) -> DropPlan:
+        # refill(count) -> bytes с содержимым новых клеток для столбца
+        rows_by_col = dict()
+        for r, c in cells:
+            rows_by_col.setdefault(c, []).append(r)
+        columns, cols = dict(), self._col_count
+        for c in sorted(rows_by_col):
+            rows = sorted(rows_by_col[c])
+            cleared = bytes(self._contents[r * cols + c] for r in rows)
+            columns[c] = ColumnDrop(c, rows, cleared, refill(len(rows)))
+        return DropPlan(columns)
+
+    def apply_drop(self, plan: DropPlan) -> None:
+        # осыпание за один проход по каждому затронутому столбцу
+        contents, active, cols = self._contents, self._active, self._col_count
+        for drop in plan:
+            c, depth = drop.col, drop.depth
+            # уцелевшие клетки - куски столбца между очищенными строками, без обхода по клеткам
+            column, bounds = contents[c:depth * cols:cols], (-1,) + drop.empty_rows
+            survivors = b''.join(column[a + 1:b] for a, b in zip(bounds, drop.empty_rows))
+            contents[c:depth * cols:cols] = drop.refills[::-1] + survivors
+            active[c:depth * cols:cols] = bytes(depth)
+            self._mark_column(c, depth)
+
+    def undo_drop(self, plan: DropPlan) -> None:
+        # обратное осыпание: уцелевшие клетки возвращаются на места, очищенные - восстанавливаются
+        contents, active, cols = self._contents, self._active, self._col_count
+        for drop in plan:
+            c, depth = drop.col, drop.depth
+            # после осыпания сверху лежат новые клетки, под ними уцелевшие в прежнем порядке
+            column, empty_rows, cleared = contents[c:depth * cols:cols], drop.empty_rows, drop.cleared
+            restored, k, s = bytearray(depth), 0, len(empty_rows)
+            for r in range(depth):
+                if k < len(empty_rows) and empty_rows[k] == r:
+                    restored[r] = cleared[k]
+                    k += 1
+                else:
+                    restored[r] = column[s]
+                    s += 1
+            contents[c:depth * cols:cols] = restored
+            active[c:depth * cols:cols] = bytes(depth)
+            self._mark_column(c, depth)
+
+    def restore(self, contents: bytes) -> None:
+        self._contents[:] = contents
+        self._active[:] = bytes(len(self._active))
+        self._dirty_all = True
+
+    def apply_drop_step(self, plan: DropPlan, step: int) -> None:
+        # один кадр анимации: в каждом столбце исчезает ещё одна очищенная клетка
+        contents, active, cols = self._contents, self._active, self._col_count
+        for drop in plan:
+            if step < len(drop):
+                c, r = drop.col, drop.empty_rows[step]
+                contents[c:(r + 1) * cols:cols] = drop.refills[step:step + 1] + contents[c:r * cols:cols]
+                active[c:(r + 1) * cols:cols] = bytes(r + 1)
+                self._mark_column(c, r + 1)
+
+
+class MoveRecord:
+    # сделанный ход: цепочка, планы осыпания и положение фигур и генератора до и после хода
+    __slots__ = ('chain', 'plans', 'before', 'after')
+
+    def __init__(self, chain, plans: List[DropPlan], before: tuple, after: tuple) -> None:
+        self.chain = chain
+        self.plans = plans
+        self.before = before
+        self.after = after
+
+    @property
+    def is_combo(self) -> bool:
+        # комбо-ход (apply_chains): chain - кортеж из нескольких цепочек
+        return bool(self.chain) and isinstance(self.chain[0][0], tuple)
+
+
+class SnapshotRing:
+    # копии поля через каждые interval ходов, хранятся последние capacity копий
+    def __init__(self, interval: int, capacity: int) -> None:
+        self.interval = interval
+        self._snapshots = deque(maxlen=capacity)
+
+    def add(self, turn: int, contents: bytes, meta: tuple) -> None:
+        if turn % self.interval == 0 and (not self._snapshots or self._snapshots[-1][0] < turn):
+            self._snapshots.append((turn, contents, meta))
+
+    def truncate(self, turn: int) -> None:
+        # ходы после turn переписаны, их копии больше не годятся
+        while self._snapshots and self._snapshots[-1][0] > turn:
+            self._snapshots.pop()
+
+    def nearest(self, turn: int):
+        # последняя копия не позже хода turn
+        for snapshot in reversed(self._snapshots):
+            if snapshot[0] <= turn:
+                return snapshot
+        return None
+
+    def copy(self) -> 'SnapshotRing':
+        ring = SnapshotRing(self.interval, self._snapshots.maxlen)
+        ring._snapshots.extend(self._snapshots)
+        return ring
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+
 class Game:
 
     START_ROW_COUNT = 8
     START_COL_COUNT = 5
     START_MINIMUM_CHAIN_LENGTH = 3
+    DEFAULT_SNAPSHOT_CAPACITY = 16
+    MAX_CASCADES = 100  # предел каскадов за ход: с подменённой досыпкой они могут не кончаться
+    DEBUG = False  # сверять отслеживаемые позиции рыцаря и принцессы с полным обходом поля
 
     def __init__(self, row_count: int = START_ROW_COUNT,
                  col_count: int = START_COL_COUNT,
-                 min_chain_len: int = START_MINIMUM_CHAIN_LENGTH) -> None:
+                 min_chain_len: int = START_MINIMUM_CHAIN_LENGTH,
+                 seed: int = None, snapshot_interval: int = None,
+                 snapshot_capacity: int = DEFAULT_SNAPSHOT_CAPACITY, block_cache: BlockCache = None) -> None:
         self._row_count = row_count
         self._col_count = col_count
         self._min_chain_len = min_chain_len
         self._start_cell = None
         self._state = None
-        self._active_cells = list()
+        self._active_cells = Chain()
+        self._knight = None
+        self._princess = None
+        self._random = None
+        self._next_seed = seed  # зерно первой игры, следующие игры без явного зерна случайны
+        self._moves = list()  # история ходов, первые _turn из них сделаны
+        self._turn = 0
+        self._snapshot_interval = snapshot_interval
+        self._snapshot_capacity = snapshot_capacity
+        self._snapshots = None
+        self._block_cache = block_cache  # общий кэш блоков GameRandom для многих игр
         self.new_game()
 
-    def new_game(self) -> None:
+    def new_game(self, seed: int = None) -> None:
+        if seed is None:
+            seed, self._next_seed = self._next_seed, None
+        self._random = GameRandom(seed, cache=self._block_cache)
         self._init_field()
         self._random_fill()
-        self[0, self.col_count//2].contents = CellContents.KNIGHT
-        self[self.row_count-1, self.col_count//2].contents = CellContents.PRINCESS
+        self._knight = (0, self.col_count//2)
+        self._princess = (self.row_count-1, self.col_count//2)
+        self[self._knight].contents = CellContents.KNIGHT
+        self[self._princess].contents = CellContents.PRINCESS
         self._state = GameState.PLAYING
+        self._moves = list()
+        self._turn = 0
+        self._snapshots = None
+        if self._snapshot_interval:
+            self._snapshots = SnapshotRing(self._snapshot_interval, self._snapshot_capacity)
+            self._snapshots.add(0, bytes(self._field.contents_buffer), self._meta())
+
+    def load_board(self, contents: bytes, random_position: int) -> None:
+        # позиция из сохранённой партии: поле целиком и номер следующего значения досыпки
+        self._field.restore(contents)
+        self._random.seek(random_position)
+        self._princess, self._knight = self._get_coordinates_princess_and_knight()
+        self._active_cells = Chain()
+        self._moves = list()
+        self._turn = 0
+        if self._snapshot_interval:
+            self._snapshots = SnapshotRing(self._snapshot_interval, self._snapshot_capacity)
+            self._snapshots.add(0, bytes(self._field.contents_buffer), self._meta())
+        self._update_playing_state()
 
     def _init_field(self):
-        self._field = [
-            copy.deepcopy([Cell() for _ in range(self.col_count)])
-            for _ in range(self.row_count)
-        ]
+        self._field = Board(self.row_count, self.col_count)
 
     def _random_fill(self):
-        p = [i for i in self.my_random(self._col_count * self._row_count)]
-        for r in range(self._row_count):
-            for c in range(self._col_count):
-                self[r, c].contents = CellContents(p[r * self._col_count + c])
+        self._field.fill(self._random.contents(self._col_count * self._row_count))
 
     def get_row_count(self):
         return self._row_count
@@ -105,107 +651,335 @@ class Game:
         return self._state
 
     @property
-    def active_cells(self) -> list:
+    def active_cells(self) -> Chain:
         return self._active_cells
 
-    def __getitem__(self, indices: Tuple[int, int]) -> Cell:
-        return self._field[indices[0]][indices[1]]
+    @property
+    def seed(self) -> int:
+        return self._random.seed
+
+    @property
+    def random(self) -> GameRandom:
+        return self._random
+
+    @property
+    def board(self) -> Board:
+        return self._field
+
+    def take_dirty_cells(self):
+        # клетки, изменившиеся с прошлого кадра, или None, если перерисовать нужно всё поле
+        dirty = self._field.take_dirty()
+        if dirty is None:
+            return None
+        return [divmod(i, self.col_count) for i in dirty]
+
+    def __getitem__(self, indices: Tuple[int, int]) -> CellView:
+        return self._field[indices]
+
+    @property
+    def knight(self):
+        return self._knight
+
+    @property
+    def princess(self):
+        return self._princess
 
     def _get_coordinates_princess_and_knight(self):
-        knight = None
-        princess = None
-
-        for r in range(self.row_count):
-            for c in range(self.col_count):
-                if knight is not None and princess is not None:
-                    break
-                if self[r, c].contents == CellContents.PRINCESS:
-                    princess = (r, c)
-                if self[r, c].contents == CellContents.KNIGHT:
-                    knight = (r, c)
-        return princess, knight
+        # полный обход поля, нужен только для проверки отслеживаемых позиций
+        contents = self._field.contents_buffer
+        coordinates = list()
+        for value in (CellContents.PRINCESS.value, CellContents.KNIGHT.value):
+            i = contents.find(value)
+            coordinates.append(divmod(i, self.col_count) if i >= 0 else None)
+        return tuple(coordinates)
+
+    def verify_positions(self) -> None:
+        princess, knight = self._get_coordinates_princess_and_knight()
+        if princess != self._princess or knight != self._knight:
+            raise AssertionError('tracked princess {}, knight {}; on board princess {}, knight {}'.format(
+                self._princess, self._knight, princess, knight))
+
+    def _track_drop(self, plan: DropPlan, step: int = None) -> None:
+        # переносит позиции рыцаря и принцессы вслед за осыпанием: целиком или на один шаг
+        tracked = list()
+        for rc in (self._knight, self._princess):
+            if rc is not None and rc[1] in plan.columns:
+                drop = plan.columns[rc[1]]
+                if step is None:
+                    rc = (drop.final_row(rc[0]), rc[1])
+                elif step < len(drop) and rc[0] < drop.empty_rows[step]:
+                    rc = (rc[0] + 1, rc[1])
+            tracked.append(rc)
+        self._knight, self._princess = tracked
 
     def _is_knight_above_princess(self) -> bool:
-        princess, knight = self._get_coordinates_princess_and_knight()
+        princess, knight = self._princess, self._knight
+        if princess is None or knight is None:
+            return False
         return princess[1] == knight[1] and princess[0] - knight[0] == 1
 
     def _update_playing_state(self) -> None:
+        if self.DEBUG:
+            self.verify_positions()
         if self._is_knight_above_princess():
             self._state = GameState.WIN
         else:
             self._state = GameState.PLAYING
 
     def _clear_active_cell(self) -> None:
+        contents, active = self._field.contents_buffer, self._field.active_buffer
         for rc in self._active_cells:
-            self[rc].contents = CellContents.EMPTY
-
-    def _step_down(self):
-        last_index = len(self._active_cells) - 1
-        new_elements = tuple(Cell(contents=CellContents(i)) for i in self.my_random(len(self._active_cells)))
-
-        tran = list(zip(*self._field))
-        for c, cc in enumerate(tran):
-            empty_cell, r = None, -1
-            for r, rr in enumerate(tran[c]):
-                if rr.contents == CellContents.EMPTY:
-                    empty_cell, index = rr, r
-                    break
-            if empty_cell is not None:
-                self._active_cells.remove((r, c))
-                tran[c] = new_elements[last_index:last_index+1] + tran[c][:r] + tran[c][r + 1:]
-                last_index -= 1
-
-        self._field = list(zip(*tran))
-
+            i = self._field.index(rc)
+            contents[i] = CellContents.EMPTY.value
+            active[i] = 0
+            self._field.mark_dirty(i)
+        if self._knight in self._active_cells:
+            self._knight = None
+        if self._princess in self._active_cells:
+            self._princess = None
+
+    def _refill(self, count) -> bytes:
+        return self._random.contents(count)
+
+    def _drop_plan(self, refill=None) -> DropPlan:
+        return self._field.drop_plan(self._active_cells, refill or self._refill)
+
+    def copy(self, shared_cache: bool = True) -> 'Game':
+        game = copy.copy(self)
+        game._field = self._field.copy()
+        game._random = self._random.copy(shared_cache)
+        game._moves = list(self._moves)
+        if self._snapshots is not None:
+            game._snapshots = self._snapshots.copy()
+        game._active_cells = Chain(self._active_cells)
+        return game
 
     def _add(self, rc):
         self._active_cells.append(rc)
         self[rc].is_active = True
 
-    def _remove(self, rc):
-        self._active_cells.remove(rc)
+    def _remove(self):
+        rc = self._active_cells.pop()
         self[rc].is_active = False
 
+    def is_inside(self, rc) -> bool:
+        return 0 <= rc[0] < self.row_count and 0 <= rc[1] < self.col_count
+
     def on_mouse_press(self, rc):
-        self._active_cells = list()
-        self._add(rc)
+        self._active_cells = Chain()
+        if self.is_inside(rc):
+            self._add(rc)
 
     def update_past_mouse_release(self):
-        self._active_cells = None
+        self._active_cells = Chain()
         self._update_playing_state()
 
     def step_down_generator(self):
         if len(self._active_cells) >= self.min_chain_len:
+            chain, before = tuple(self._active_cells), self._meta()
+            plan = self._drop_plan()
             self._clear_active_cell()
-            while len(self._active_cells) > 0:
-                self._step_down()
+            self._active_cells = Chain()
+            for step in range(plan.steps):
+                self._field.apply_drop_step(plan, step)
+                self._track_drop(plan, step)
                 yield True
+            self._record(chain, [plan], before)
         else:
             for current_rc in self._active_cells:
                 self[current_rc].is_active = False
             yield False
 
+    def apply_active_chain(self):
+        # ход выделенной цепочкой сразу до конечного поля, для анимации по FallAnimation;
+        # возвращает план осыпания или None, если цепочка коротка - тогда выделение снимается
+        chain = list(self._active_cells)
+        plan = self.apply_chain(chain) if len(chain) >= self.min_chain_len else None
+        if plan is None:
+            for rc in chain:
+                self[rc].is_active = False
+            self._active_cells = Chain()
+        return plan
+
     def on_mouse_move(self, rc) -> bool:
-        if rc in self._active_cells:
+        # возвращает True, если выделение изменилось
+        chain = self._active_cells
+        if not chain or not self.is_inside(rc):
+            return False
+        if rc == chain.previous:
+            self._remove()
+            return True
+        if rc in chain:
             return False
         current_cell = self[rc]
-        last_cell = self[self._active_cells[-1]]
-        if len(self._active_cells) >= 2:
-            if self._active_cells[-2] == rc:
-                self._remove(self._active_cells[-1])
-                return
-        if current_cell.contents == last_cell.contents and \
-                self.is_near(rc, self._active_cells[-1]) and \
+        if current_cell.contents == self[chain.last].contents and \
+                self.is_near(rc, chain.last) and \
                 not current_cell.is_active:
             self._add(rc)
+            return True
+        return False
+
+    def is_valid_chain(self, chain) -> bool:
+        # те же правила, что и при выделении мышью: соседние по стороне клетки с одинаковым содержимым
+        if len(chain) < self.min_chain_len or not all(self.is_inside(rc) for rc in chain):
+            return False
+        if len(set(chain)) != len(chain):
+            return False
+        contents = self[chain[0]].contents
+        if contents == CellContents.EMPTY:
+            return False
+        for prev_rc, rc in zip(chain, chain[1:]):
+            if not self.is_near(prev_rc, rc) or self[rc].contents != contents:
+                return False
         return True
 
+    def apply_chain(self, chain, refill=None):
+        # ход целиком без анимации, возвращает план осыпания или None, если цепочка недопустима;
+        # refill(count) -> bytes подменяет случайную досыпку новых клеток
+        chain = [tuple(rc) for rc in chain]
+        if self._state != GameState.PLAYING or not self.is_valid_chain(chain):
+            return None
+        before = self._meta()
+        plan = self._clear_and_drop(chain, refill)
+        self._record(tuple(chain), [plan], before)
+        self._update_playing_state()
+        return plan
+
+    def apply_chains(self, chains, refill=None, cascade: bool = False):
+        # комбо-ход: несколько непересекающихся цепочек очищаются вместе и осыпаются за один проход.
+        # cascade - после досыпки убираются связные группы из min_chain_len и более одинаковых фигур,
+        # пока они появляются. Возвращает планы осыпания (первый - для самих цепочек, за ним каскады)
+        # или None, если ход недопустим
+        chains = [[tuple(rc) for rc in chain] for chain in chains]
+        cells = [rc for chain in chains for rc in chain]
+        if self._state != GameState.PLAYING or not chains or len(set(cells)) != len(cells) or \
+                not all(self.is_valid_chain(chain) for chain in chains):
+            return None
+        before = self._meta()
+        plans = [self._clear_and_drop(cells, refill)]
+        if cascade:
+            plans.extend(self._cascade(plans[0], refill))
+        record = tuple(chains[0]) if len(chains) == 1 else tuple(tuple(chain) for chain in chains)
+        self._record(record, plans, before)
+        self._update_playing_state()
+        return plans
+
+    def _clear_and_drop(self, cells, refill=None) -> DropPlan:
+        self._active_cells = Chain(cells)
+        plan = self._drop_plan(refill)
+        self._clear_active_cell()
+        self._active_cells = Chain()
+        self._field.apply_drop(plan)
+        self._track_drop(plan)
+        return plan
+
+    def _cascade(self, plan: DropPlan, refill=None) -> List[DropPlan]:
+        # каскады до тех пор, пока осыпание создаёт новые группы или пока не выиграна партия
+        plans, cols = list(), self.col_count
+        while len(plans) < self.MAX_CASCADES and not self._is_knight_above_princess():
+            # в очередь попадают только клетки, сдвинутые осыпанием: новые группы могут появиться лишь через них
+            queue = deque(r * cols + drop.col for drop in plan for r in range(drop.depth))
+            cells = self._matches(queue)
+            if not cells:
+                break
+            plan = self._clear_and_drop(cells, refill)
+            plans.append(plan)
+        return plans
+
+    def _matches(self, queue: deque) -> List[Tuple[int, int]]:
+        # связные группы одинаковых фигур из не менее чем min_chain_len клеток, достижимые из клеток очереди;
+        # каждая клетка обходится не больше одного раза
+        contents, cols, size = self._field.contents_buffer, self.col_count, len(self._field.contents_buffer)
+        seen, cells = set(), list()
+        while queue:
+            i = queue.popleft()
+            if i in seen or contents[i] in _UNMATCHED:
+                continue
+            value, group, stack = contents[i], [i], [i]
+            seen.add(i)
+            while stack:
+                j = stack.pop()
+                c = j % cols
+                for k in (j - cols, j + cols, j - 1 if c else -1, j + 1 if c + 1 < cols else -1):
+                    if 0 <= k < size and k not in seen and contents[k] == value:
+                        seen.add(k)
+                        group.append(k)
+                        stack.append(k)
+            if len(group) >= self.min_chain_len:
+                cells.extend(divmod(j, cols) for j in group)
+        return cells
+
+    # история ходов: отмена и повтор меняют только затронутые ходом клетки
+
+    def _meta(self) -> tuple:
+        return self._knight, self._princess, self._random.position
+
+    def _set_meta(self, meta: tuple) -> None:
+        self._knight, self._princess, position = meta
+        self._random.seek(position)
+
+    def _record(self, chain, plans: List[DropPlan], before: tuple) -> None:
+        del self._moves[self._turn:]
+        self._moves.append(MoveRecord(chain, plans, before, self._meta()))
+        self._turn += 1
+        if self._snapshots is not None:
+            self._snapshots.truncate(self._turn - 1)
+            self._snapshots.add(self._turn, bytes(self._field.contents_buffer), self._meta())
+
+    @property
+    def turn(self) -> int:
+        return self._turn
+
+    @property
+    def moves(self) -> List[MoveRecord]:
+        # все записанные ходы, включая отменённые, которые ещё можно повторить
+        return self._moves
+
+    @property
+    def can_undo(self) -> bool:
+        return self._turn > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self._turn < len(self._moves)
+
+    def undo(self) -> bool:
+        if not self.can_undo:
+            return False
+        self._turn -= 1
+        record = self._moves[self._turn]
+        for plan in reversed(record.plans):
+            self._field.undo_drop(plan)
+        self._set_meta(record.before)
+        self._update_playing_state()
+        return True
+
+    def redo(self) -> bool:
+        if not self.can_redo:
+            return False
+        record = self._moves[self._turn]
+        self._turn += 1
+        for plan in record.plans:
+            self._field.apply_drop(plan)
+        self._set_meta(record.after)
+        self._update_playing_state()
+        return True
+
+    def goto(self, turn: int) -> None:
+        # переход к ходу turn: от ближайшей копии поля, если она ближе текущего хода
+        turn = max(0, min(turn, len(self._moves)))
+        snapshot = self._snapshots.nearest(turn) if self._snapshots is not None else None
+        if snapshot is not None and turn - snapshot[0] < abs(turn - self._turn):
+            self._turn, contents, meta = snapshot
+            self._field.restore(contents)
+            self._set_meta(meta)
+            self._update_playing_state()
+        while self._turn > turn:
+            self.undo()
+        while self._turn < turn:
+            self.redo()
+
     @staticmethod
     def is_near(cell1, cell2) -> bool:
         return (abs(cell1[0] - cell2[0]) == 0 and abs(cell1[1] - cell2[1]) == 1) or \
-               (abs(cell1[0] - cell2[0]) == 1 and abs(cell1[1] - cell2[1]) == 0)
-
-    @staticmethod
-    def my_random(count):
-        for _ in range(count):
-            yield rnd.randint(0, 2)
\ No newline at end of file
+               (abs(cell1[0] - cell2[0]) == 1 and abs(cell1[1] - cell2[1]) == 0)
\ No newline at end of file
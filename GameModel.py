@@ -0,0 +1,49 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from Game import Game
+
+
+class GameModel(QAbstractTableModel):
+    # модель поверх Game без хранения данных по клеткам: содержимое клеток рисует делегат,
+    # модели нужны только размеры поля и сигналы об изменившихся клетках
+    MAX_CELL_SIGNALS = 1024
+
+    def __init__(self, game: Game, parent=None) -> None:
+        super().__init__(parent)
+        self._game = game
+        self._row_count = game.row_count
+        self._col_count = game.col_count
+
+    @property
+    def game(self) -> Game:
+        return self._game
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._col_count
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        return None
+
+    def refresh(self) -> None:
+        # новая игра: полный сброс нужен только при смене размеров поля
+        if (self._row_count, self._col_count) != (self._game.row_count, self._game.col_count):
+            self.beginResetModel()
+            self._row_count, self._col_count = self._game.row_count, self._game.col_count
+            self.endResetModel()
+        else:
+            self.cells_changed(None)
+
+    def cells_changed(self, cells) -> None:
+        # cells - список (r, c) или None для всего поля. Сигнал идёт на каждую клетку отдельно:
+        # на диапазон из нескольких клеток QAbstractItemView в Qt 5 перерисовывает весь viewport.
+        # Если клеток много, один сигнал на всё поле дешевле тысяч отдельных
+        if cells is None or len(cells) > self.MAX_CELL_SIGNALS:
+            if self._row_count and self._col_count:
+                self.dataChanged.emit(self.index(0, 0), self.index(self._row_count - 1, self._col_count - 1))
+            return
+        for r, c in cells:
+            index = self.index(r, c)
+            self.dataChanged.emit(index, index)
@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+
+from Game import BlockCache, Game, GameState
+from Instruments import Instruments
+from MoveGenerator import MoveGenerator
+
+# Сервер партий: один процесс держит много игр (боты, нагрузочные тесты, удалённые клиенты).
+# Протокол - по одному JSON-объекту на строку в обе стороны:
+#   запрос  {"id": ..., "op": "...", "session": N, ...параметры}
+#   ответ   {"id": ..., "ok": true, ...} или {"id": ..., "ok": false, "error": "..."}
+# Операции:
+#   new_game     rows, cols, min_chain_len, seed - новая партия; с session - заново в той же сессии
+#   apply_chain  chain: [[r, c], ...] - ход целиком, без анимации
+#   apply_chains chains: [[[r, c], ...], ...], cascade - комбо-ход несколькими цепочками, с каскадами
+#   state        поле строкой цифр CellContents по строкам, рыцарь, принцесса, состояние, номер хода
+#   undo         отмена последнего хода
+#   moves        limit - допустимые цепочки для ботов
+#   close        закрыть сессию
+#   stats        число сессий, память процесса, время обработки операций
+# Партия хранится как Game: поле - bytearray по байту на клетку, блоки генератора досыпки
+# берутся из общего на все сессии BlockCache, а не держатся в каждой сессии
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_SESSIONS = 100000
+DEFAULT_CACHE_BLOCKS = 1024  # 4 МБ блоков досыпки на все сессии
+DEFAULT_MOVES_LIMIT = 16
+_DIGITS = bytes((ord('0') + v) & 0xff for v in range(256))  # CellContents -> цифра
+
+
+class ServerError(Exception):
+    pass
+
+
+def rss_kb():
+    # текущий размер резидентной памяти процесса или None, если его не узнать
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # пиковая, но лучше, чем ничего
+
+
+class GameServer:
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, cache_blocks: int = DEFAULT_CACHE_BLOCKS) -> None:
+        self.max_sessions = max_sessions
+        self.block_cache = BlockCache(cache_blocks)
+        self.instruments = Instruments()
+        self._sessions = dict()
+        self._ids = itertools.count(1)
+        self._ops = {'new_game': self.op_new_game, 'apply_chain': self.op_apply_chain,
+                     'apply_chains': self.op_apply_chains, 'state': self.op_state,
+                     'undo': self.op_undo, 'moves': self.op_moves, 'close': self.op_close, 'stats': self.op_stats}
+        self._times = {op: self.instruments.histogram(op) for op in self._ops}
+
+    @property
+    def session_count(self) -> int:
+        return len(self._sessions)
+
+    def _game(self, request: dict) -> Game:
+        game = self._sessions.get(request.get('session'))
+        if game is None:
+            raise ServerError('unknown session {}'.format(request.get('session')))
+        return game
+
+    @staticmethod
+    def _int(request: dict, name: str, default: int) -> int:
+        # числа из JSON: int(1e400) или int(true) не должны проходить проверку
+        value = request.get(name, default)
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ServerError('{} must be an integer'.format(name))
+        return value
+
+    @staticmethod
+    def _position(game: Game) -> dict:
+        return {'knight': game.knight, 'princess': game.princess, 'state': game.state.name, 'turn': game.turn}
+
+    def op_new_game(self, request: dict) -> dict:
+        rows = self._int(request, 'rows', Game.START_ROW_COUNT)
+        cols = self._int(request, 'cols', Game.START_COL_COUNT)
+        min_chain_len = self._int(request, 'min_chain_len', Game.START_MINIMUM_CHAIN_LENGTH)
+        if not (3 <= rows <= 1000 and 1 <= cols <= 1000 and min_chain_len >= 1):
+            raise ServerError('bad board size {}x{}, min chain {}'.format(rows, cols, min_chain_len))
+        seed = request.get('seed')
+        if seed is not None and self._int(request, 'seed', None) < 0:
+            raise ServerError('seed must be a non-negative integer')
+        session = request.get('session')
+        if session is not None:
+            self._game(request)
+        elif len(self._sessions) >= self.max_sessions:
+            raise ServerError('too many sessions')
+        else:
+            session = next(self._ids)
+        game = Game(rows, cols, min_chain_len, seed, block_cache=self.block_cache)
+        self._sessions[session] = game
+        response = {'session': session, 'seed': game.seed}
+        response.update(self._position(game))
+        return response
+
+    def op_apply_chain(self, request: dict) -> dict:
+        game = self._game(request)
+        chain = request.get('chain')
+        if not isinstance(chain, list) or not all(isinstance(rc, list) and len(rc) == 2 for rc in chain):
+            raise ServerError('chain must be a list of [row, col] pairs')
+        if game.apply_chain(chain) is None:
+            raise ServerError('invalid chain' if game.state == GameState.PLAYING else 'game is over')
+        return self._position(game)
+
+    def op_apply_chains(self, request: dict) -> dict:
+        game = self._game(request)
+        chains = request.get('chains')
+        if not isinstance(chains, list) or not all(
+                isinstance(chain, list) and all(isinstance(rc, list) and len(rc) == 2 for rc in chain)
+                for chain in chains):
+            raise ServerError('chains must be a list of chains of [row, col] pairs')
+        plans = game.apply_chains(chains, cascade=bool(request.get('cascade', False)))
+        if plans is None:
+            raise ServerError('invalid chains' if game.state == GameState.PLAYING else 'game is over')
+        response = {'cascades': len(plans) - 1}
+        response.update(self._position(game))
+        return response
+
+    def op_state(self, request: dict) -> dict:
+        game = self._game(request)
+        response = {'rows': game.row_count, 'cols': game.col_count, 'min_chain_len': game.min_chain_len,
+                    'seed': game.seed, 'board': bytes(game.board.contents_buffer).translate(_DIGITS).decode('ascii')}
+        response.update(self._position(game))
+        return response
+
+    def op_undo(self, request: dict) -> dict:
+        game = self._game(request)
+        response = {'undone': game.undo()}
+        response.update(self._position(game))
+        return response
+
+    def op_moves(self, request: dict) -> dict:
+        game = self._game(request)
+        if game.state != GameState.PLAYING:
+            return {'chains': []}
+        limit = self._int(request, 'limit', DEFAULT_MOVES_LIMIT)
+        if limit < 0:
+            raise ServerError('limit must not be negative')
+        return {'chains': MoveGenerator(game).chains(limit)}
+
+    def op_close(self, request: dict) -> dict:
+        self._game(request)
+        del self._sessions[request['session']]
+        return dict()
+
+    def op_stats(self, request: dict) -> dict:
+        return {'sessions': len(self._sessions), 'rss_kb': rss_kb(), 'cached_blocks': len(self.block_cache),
+                'ops': {op: h.summary() for op, h in self.instruments.histograms.items() if h.count}}
+
+    def handle(self, request) -> dict:
+        # один запрос целиком; ошибки запроса не закрывают соединение
+        if not isinstance(request, dict):
+            return {'id': None, 'ok': False, 'error': 'request must be a JSON object'}
+        op_name = request.get('op')
+        op = self._ops.get(op_name) if isinstance(op_name, str) else None
+        if op is None:
+            return {'id': request.get('id'), 'ok': False, 'error': 'unknown op {}'.format(op_name)}
+        start = time.perf_counter()
+        try:
+            response = op(request)
+        except (ServerError, TypeError, ValueError, ArithmeticError) as e:
+            response = {'ok': False, 'error': str(e)}
+        else:
+            response['ok'] = True
+        self._times[op_name].add(time.perf_counter() - start)
+        response['id'] = request.get('id')
+        return response
+
+    def handle_line(self, line: bytes) -> bytes:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = {'id': None, 'ok': False, 'error': 'malformed JSON'}
+        else:
+            response = self.handle(request)
+        return json.dumps(response, separators=(',', ':')).encode() + b'\n'
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # сессии принадлежат серверу, а не соединению: после переподключения партию можно продолжить
+        self.instruments.count('connections')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    writer.write(self.handle_line(line))
+                    await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix: str = None):
+        if unix is not None:
+            return await asyncio.start_unix_server(self.serve_connection, unix)
+        return await asyncio.start_server(self.serve_connection, host, port)
+
+
+class GameClient:
+    # клиент протокола: запросы можно слать одновременно, ответы сопоставляются по id
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._waiting = dict()
+        self._task = asyncio.ensure_future(self._read())
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix: str = None) -> 'GameClient':
+        if unix is not None:
+            return cls(*await asyncio.open_unix_connection(unix))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def _read(self) -> None:
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._waiting.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('connection closed'))
+            self._waiting.clear()
+
+    async def call(self, op: str, **params) -> dict:
+        # ответ целиком; ошибка сервера поднимается как ServerError
+        request_id = next(self._ids)
+        params.update(id=request_id, op=op)
+        future = asyncio.get_event_loop().create_future()
+        self._waiting[request_id] = future
+        self._writer.write(json.dumps(params, separators=(',', ':')).encode() + b'\n')
+        await self._writer.drain()
+        response = await future
+        if not response['ok']:
+            raise ServerError(response['error'])
+        return response
+
+    async def close(self) -> None:
+        self._writer.close()
+        self._task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сервер партий: JSON по строке на запрос через локальный сокет')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help='0 - любой свободный порт')
+    parser.add_argument('--unix', metavar='PATH', help='слушать unix-сокет вместо TCP')
+    parser.add_argument('--max-sessions', type=int, default=DEFAULT_MAX_SESSIONS)
+    parser.add_argument('--cache-blocks', type=int, default=DEFAULT_CACHE_BLOCKS,
+                        help='блоков досыпки в общем кэше, по 4 КБ')
+    args = parser.parse_args()
+
+    async def serve():
+        server = GameServer(args.max_sessions, args.cache_blocks)
+        listener = await server.start(args.host, args.port, args.unix)
+        address = args.unix if args.unix is not None else '{}:{}'.format(*listener.sockets[0].getsockname()[:2])
+        print('listening on {}'.format(address), flush=True)
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from Game import Game, GameState
+from MoveGenerator import MoveGenerator
+from Solver import Solver
+
+DEFAULT_BUDGET = 0.100  # секунд на подсказку
+BUDGETS = (0.010, 0.025, 0.050, DEFAULT_BUDGET)  # ступени, по которым отчитывается подсказка
+CANDIDATE_LIMIT = 64
+LOOKAHEAD_LIMIT = 16  # сколько лучших кандидатов проверять ходом вперёд
+
+
+class Hint:
+    def __init__(self, chain, score: int, candidates: int, elapsed: float, complete: bool,
+                 generation: int = 0) -> None:
+        self.chain = chain  # лучшая цепочка или None, если ходов нет
+        self.score = score  # на сколько строк опустится рыцарь
+        self.candidates = candidates  # сколько цепочек оценено
+        self.elapsed = elapsed
+        self.complete = complete  # оценка закончена до истечения бюджета
+        self.generation = generation  # номер запроса, устаревшие подсказки отбрасываются
+
+    @property
+    def budget(self):
+        # наименьшая из ступеней BUDGETS, в которую уложился поиск, или None
+        if not self.complete:
+            return None
+        return next((budget for budget in BUDGETS if self.elapsed <= budget), None)
+
+    def __str__(self) -> str:
+        return 'chain = {}, score = {}, candidates = {}, elapsed = {:.1f} ms, budget = {}'.format(
+            self.chain, self.score, self.candidates, self.elapsed * 1000, self.budget)
+
+
+def find_hint(game: Game, budget: float = DEFAULT_BUDGET, cancelled: threading.Event = None) -> Hint:
+    # цепочки ранжируются по тому, насколько они опускают рыцаря к принцессе; равные по этому
+    # признаку различаются лучшим следующим ходом. По истечении бюджета возвращается лучшее найденное
+    start = time.perf_counter()
+    deadline = start + budget
+
+    def stopped() -> bool:
+        return (cancelled is not None and cancelled.is_set()) or time.perf_counter() > deadline
+
+    def hint(ranked, complete):
+        chain, score = (ranked[0][1], ranked[0][0][0]) if ranked else (None, 0)
+        return Hint(chain, score, len(ranked), time.perf_counter() - start, complete)
+
+    if game.state != GameState.PLAYING:
+        return hint([], True)
+    generator = MoveGenerator(game)
+    reachable = Solver.reachable(game)
+    candidates, seen = list(), set()
+    if reachable:
+        knight, princess = game.knight, game.princess
+        segment = generator.mask((r, knight[1]) for r in range(knight[0] + 1, princess[0]))
+        candidates += Solver.column_runs(game) + generator.chains(CANDIDATE_LIMIT, touching=segment)
+    if stopped():
+        return hint([], False)
+    candidates += generator.chains(CANDIDATE_LIMIT)
+
+    ranked = list()
+    for chain in candidates:
+        cells = frozenset(chain)
+        if cells not in seen:
+            seen.add(cells)
+            ranked.append(((Solver.between(game, chain) if reachable else 0, 0), chain))
+    ranked.sort(key=lambda item: -item[0][0])
+    if not reachable or stopped():
+        return hint(ranked, not reachable)
+
+    best = ranked[0][0][0] if ranked else 0
+    for i, ((score, _), chain) in enumerate(ranked[:LOOKAHEAD_LIMIT]):
+        if score < best:
+            break
+        if stopped():
+            ranked.sort(key=lambda item: item[0], reverse=True)
+            return hint(ranked, False)
+        child = game.copy()
+        child.apply_chain(chain)
+        follow = 0
+        if child.state == GameState.WIN:
+            follow = child.row_count
+        elif Solver.reachable(child):
+            follow = max((Solver.between(child, run) for run in Solver.column_runs(child)), default=0)
+        ranked[i] = ((score, follow), chain)
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return hint(ranked, True)
+
+
+class HintEngine(QObject):
+    # подсказка считается в фоновом потоке; новый запрос отменяет предыдущий,
+    # результат приходит в поток интерфейса сигналом hint_ready
+    hint_ready = pyqtSignal(object)
+
+    def __init__(self, budget: float = DEFAULT_BUDGET, parent=None) -> None:
+        super().__init__(parent)
+        self.budget = budget
+        self._generation = 0
+        self._cancelled = threading.Event()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def request(self, game: Game) -> int:
+        # поле копируется здесь, поток работает только со своей копией
+        self.cancel()
+        self._generation += 1
+        self._cancelled = threading.Event()
+        thread = threading.Thread(target=self._run, daemon=True,
+                                  args=(game.copy(shared_cache=False), self._generation, self._cancelled))
+        thread.start()
+        return self._generation
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def _run(self, game: Game, generation: int, cancelled: threading.Event) -> None:
+        hint = find_hint(game, self.budget, cancelled)
+        hint.generation = generation
+        if not cancelled.is_set():
+            self.hint_ready.emit(hint)
@@ -0,0 +1,147 @@
+import io
+import json
+import time
+from collections import deque
+
+TRACE_CAPACITY = 10000  # последних записей трассировки
+PROFILE_LINES = 40
+
+
+class Histogram:
+    # время в микросекундах по корзинам-степеням двойки: корзина k держит значения из [2^(k-1), 2^k)
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * 40
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        k = int(seconds * 1e6).bit_length()
+        self.buckets[k if k < 40 else 39] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        # верхняя граница корзины, в которую попал q-й процентиль, в секундах
+        rank, seen = q / 100 * self.count, 0
+        for k, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min((1 << k) / 1e6, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {'count': self.count, 'mean_us': round(self.mean * 1e6, 2), 'max_us': round(self.max * 1e6, 2),
+                'p50_us': self.percentile(50) * 1e6, 'p90_us': self.percentile(90) * 1e6,
+                'p99_us': self.percentile(99) * 1e6,
+                'buckets_us': {1 << k: n for k, n in enumerate(self.buckets) if n}}
+
+
+class Instruments:
+    # счётчики и гистограммы времени горячих путей интерфейса. Трассировка выключена по умолчанию:
+    # вызывающий код проверяет tracing до вызова trace(), так что выключенная стоит одно чтение атрибута;
+    # включённая пишет каждое trace_every-е событие
+    def __init__(self, trace_every: int = 0) -> None:
+        self.counters = dict()
+        self.histograms = dict()
+        self._trace = deque(maxlen=TRACE_CAPACITY)
+        self._trace_every = 0
+        self._trace_skip = 0
+        self.tracing = False
+        self.set_trace_every(trace_every)
+        self._profile = None
+        self._profile_text = None
+        self._started = time.perf_counter()
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def histogram(self, name: str) -> Histogram:
+        # горячий путь может взять гистограмму заранее и вызывать её add() напрямую
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def record(self, name: str, seconds: float) -> None:
+        self.histogram(name).add(seconds)
+
+    def get_trace_every(self) -> int:
+        return self._trace_every
+
+    def set_trace_every(self, every: int) -> None:
+        # 0 - трассировка выключена
+        self._trace_every = every
+        self._trace_skip = 0
+        self.tracing = every > 0
+
+    trace_every = property(get_trace_every, set_trace_every)
+
+    def trace(self, name: str, *args) -> None:
+        self._trace_skip -= 1
+        if self._trace_skip > 0:
+            return
+        self._trace_skip = self._trace_every
+        self._trace.append((round(time.perf_counter() - self._started, 6), name) + args)
+
+    @property
+    def traces(self):
+        return list(self._trace)
+
+    @property
+    def profiling(self) -> bool:
+        return self._profile is not None
+
+    def start_profile(self) -> None:
+        # cProfile и pstats загружаются только при профилировании, на запуск программы они не влияют
+        if self._profile is None:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def _profile_report(self) -> str:
+        # отчёт по функциям с наибольшим собственным временем
+        import pstats
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats('tottime').print_stats(PROFILE_LINES)
+        return out.getvalue()
+
+    def stop_profile(self) -> str:
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile_text = self._profile_report()
+            self._profile = None
+        return self._profile_text
+
+    def as_dict(self) -> dict:
+        return {'uptime_s': round(time.perf_counter() - self._started, 3),
+                'counters': dict(self.counters),
+                'histograms': {name: h.summary() for name, h in sorted(self.histograms.items())},
+                'trace_every': self._trace_every,
+                'trace': self.traces,
+                'profile': self._profile_text}
+
+    def dump(self, path: str) -> None:
+        # идущее профилирование не прерывается, в файл попадает отчёт на текущий момент
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile_text = self._profile_report()
+            self._profile.enable()
+        with open(path, 'w', encoding='UTF-8') as f:
+            json.dump(self.as_dict(), f, ensure_ascii=False, indent=1)
+
+    def __str__(self) -> str:
+        lines = ['{:<20} {:>8} {:>10} {:>10} {:>10}'.format('', 'count', 'mean, us', 'p90, us', 'max, us')]
+        for name, h in sorted(self.histograms.items()):
+            lines.append('{:<20} {:>8} {:>10.1f} {:>10.0f} {:>10.0f}'.format(
+                name, h.count, h.mean * 1e6, h.percentile(90) * 1e6, h.max * 1e6))
+        lines += ['{:<20} {:>8}'.format(name, n) for name, n in sorted(self.counters.items())]
+        return '\n'.join(lines)
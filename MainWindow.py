@@ -1,14 +1,48 @@
 import os
+from time import perf_counter
+from typing import TYPE_CHECKING
 
 from mainForm_ui import Ui_MainWindow as MainWindowUI
-from Game import CellContents, Game, GameState
-
-from time import time, sleep
-
-from PyQt5 import QtSvg, QtWidgets
-from PyQt5.QtGui import QMouseEvent, QPainter, QStandardItemModel
-from PyQt5.QtWidgets import QMainWindow, QItemDelegate, QStyleOptionViewItem, QInputDialog, QMessageBox
-from PyQt5.QtCore import QModelIndex, QRectF, QTimer, Qt
+from BoardPool import BoardPool
+from Game import CellContents, FallAnimation, Game, GameState
+from GameModel import GameModel
+from HintEngine import HintEngine
+from Instruments import Instruments
+from PixmapCache import PixmapCache
+
+from PyQt5 import QtWidgets
+from PyQt5.QtGui import QColor, QImage, QMouseEvent, QPaintEvent, QPainter
+from PyQt5.QtWidgets import QMainWindow, QItemDelegate, QStyleOptionViewItem, QInputDialog, QMessageBox, QFileDialog, \
+    QTableView
+from PyQt5.QtCore import QModelIndex, QRect, QTimer, Qt
+
+if TYPE_CHECKING:
+    from Calibration import CalibrationService
+
+# картинки и правила лежат рядом с модулем, а не в текущей папке
+RESOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# картинка для клетки по (содержимое, выделена ли клетка)
+IMAGE_NAMES = {
+    (CellContents.PRINCESS, False): 'princess',
+    (CellContents.PRINCESS, True): 'princess',
+    (CellContents.KNIGHT, False): 'knight',
+    (CellContents.KNIGHT, True): 'knight',
+    (CellContents.CIRCLE, False): 'circle',
+    (CellContents.CIRCLE, True): 'active_circle',
+    (CellContents.SQUARE, False): 'square',
+    (CellContents.SQUARE, True): 'active_square',
+    (CellContents.TRIANGLE, False): 'triangle',
+    (CellContents.TRIANGLE, True): 'active_triangle',
+    (CellContents.EMPTY, False): 'closed',
+    (CellContents.EMPTY, True): 'closed',
+}
+
+# цвета клеток вместо картинок, когда клетки мельче MainWindow.LOD_CELL_SIZE: по значению CellContents,
+# выделенные клетки - цветом фона картинок active_*, пустые - цветом фона поля
+LOD_COLORS = (QColor(0, 170, 68), QColor(16, 64, 192), QColor(253, 238, 28), QColor(40, 40, 40),
+              QColor(212, 160, 23), QColor(173, 173, 173))
+LOD_ACTIVE_COLOR = QColor(255, 51, 0)
 
 
 class FieldSizeDialog(QtWidgets.QDialog):
@@ -21,17 +55,19 @@ class FieldSizeDialog(QtWidgets.QDialog):
         width_label = QtWidgets.QLabel('Ширина игрового поля:')
         height_label = QtWidgets.QLabel('Высота игрового поля:')
         chain_len_label = QtWidgets.QLabel('Минимальная длина цепочки:')
+        difficulty_label = QtWidgets.QLabel('Сложность:')
+        self.difficulty_value = QtWidgets.QLabel()
         
         self.size_spinbox = QtWidgets.QSpinBox()
-        self.size_spinbox.setRange(10, 100)
+        self.size_spinbox.setRange(2, 100)
         self.size_spinbox.setValue(self.main.cell_size)
 
         self.width_spinbox = QtWidgets.QSpinBox()
-        self.width_spinbox.setRange(3, 100)
+        self.width_spinbox.setRange(3, self.main.MAX_COL_COUNT)
         self.width_spinbox.setValue(self.main.game.col_count)
 
         self.height_spinbox = QtWidgets.QSpinBox()
-        self.height_spinbox.setRange(3, 100)
+        self.height_spinbox.setRange(3, self.main.MAX_ROW_COUNT)
         self.height_spinbox.setValue(self.main.game.row_count)
 
         self.chain_len_spinbox = QtWidgets.QSpinBox()
@@ -41,6 +77,12 @@ class FieldSizeDialog(QtWidgets.QDialog):
         save_button = QtWidgets.QPushButton('Сохранить изменения')
         save_button.clicked.connect(self.save)
 
+        # сложность берётся из кэша калибровки, неоценённые конфигурации досчитываются в фоне
+        for spinbox in (self.width_spinbox, self.height_spinbox, self.chain_len_spinbox):
+            spinbox.valueChanged.connect(self._update_difficulty)
+        self.main.calibration.calibrated.connect(self._on_calibrated)
+        self.finished.connect(self._stop_calibration)
+
         layout = QtWidgets.QGridLayout()
         layout.addWidget(size_label, 0, 0)
         layout.addWidget(self.size_spinbox, 0, 1)
@@ -50,8 +92,48 @@ class FieldSizeDialog(QtWidgets.QDialog):
         layout.addWidget(self.height_spinbox, 2, 1)
         layout.addWidget(chain_len_label, 3, 0)
         layout.addWidget(self.chain_len_spinbox, 3, 1)
-        layout.addWidget(save_button, 4, 0, 1, 2)
+        layout.addWidget(difficulty_label, 4, 0)
+        layout.addWidget(self.difficulty_value, 4, 1)
+        layout.addWidget(save_button, 5, 0, 1, 2)
         self.setLayout(layout)
+        self._update_difficulty()
+
+    @property
+    def config(self):
+        return self.height_spinbox.value(), self.width_spinbox.value(), self.chain_len_spinbox.value()
+
+    def _update_difficulty(self):
+        calibration = self.main.calibration
+        if self.height_spinbox.value() * self.width_spinbox.value() >= self.main.LARGE_BOARD_CELLS:
+            self.difficulty_value.setText('для больших полей не оценивается')
+            calibration.cancel()
+            return
+        entry = calibration.get(self.config)
+        self._show_difficulty(entry)
+        calibration.request(self.config)
+
+    def _stop_calibration(self):
+        # оценка нужна только, пока открыт диалог
+        self.main.calibration.cancel()
+        try:
+            self.main.calibration.calibrated.disconnect(self._on_calibrated)
+        except TypeError:
+            pass  # уже отключено
+
+    def _on_calibrated(self, config, entry):
+        if config == self.config:
+            self._show_difficulty(entry)
+
+    def _show_difficulty(self, entry):
+        if entry is None:
+            self.difficulty_value.setText('оценивается...')
+            return
+        moves = entry.expected_moves
+        text = '{}: выигрышей {:.0%}, в среднем {} ходов, тупиков {:.0%}'.format(
+            entry.label, entry.win_rate, '-' if moves is None else '{:.0f}'.format(moves), entry.dead_rate)
+        if entry.games < self.main.calibration.target:
+            text += ' (уточняется, {} партий)'.format(entry.games)
+        self.difficulty_value.setText(text)
 
     def save(self):
         self.main.cell_size = self.size_spinbox.value()
@@ -62,8 +144,14 @@ class FieldSizeDialog(QtWidgets.QDialog):
 
 
 class MainWindow(QMainWindow, MainWindowUI):
-    GAME_RULE_FILE = "game_rule.txt"
-    SLEEP_TIME = 0.300
+    GAME_RULE_FILE = os.path.join(RESOURCE_DIR, 'game_rule.txt')
+    _game_rules = None
+    SLEEP_TIME = 0.300  # секунд на строку падения
+    FRAME_INTERVAL = 16  # мс между кадрами осыпания, около 60 кадров в секунду
+    HINT_COLOR = QColor(255, 215, 0, 110)
+    LARGE_BOARD_CELLS = 2500  # с такого числа клеток поле рисуется одним проходом paintEvent
+    LOD_CELL_SIZE = 16  # клетки мельче рисуются цветными прямоугольниками
+    MAX_ROW_COUNT = MAX_COL_COUNT = 500
 
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
@@ -72,18 +160,50 @@ class MainWindow(QMainWindow, MainWindowUI):
         self._cell_size = 50
         self._sleep_time = self.SLEEP_TIME
 
+        # счётчики и время горячих путей; stats_file - куда сохранить их при выходе
+        self._stats = Instruments()
+        self.stats_file = None
+        self._move_time = self._stats.histogram('on_mouse_move')
+        self._step_time = self._stats.histogram('fall_frame')
+        self._update_time = self._stats.histogram('_update_view')
+        self._paint_time = self._stats.histogram('on_item_paint')
+        self._board_paint_time = self._stats.histogram('_paint_board')
+
         self._time = 0
         self._timer = QTimer(parent)
         self._timer.setInterval(1000)
         self._timer.timeout.connect(self._on_time_tick)
 
-        images_dir = os.path.join(os.path.dirname(__file__), 'images')
-        self._images = {
-            os.path.splitext(f)[0]: QtSvg.QSvgRenderer(os.path.join(images_dir, f))
-            for f in os.listdir(images_dir)
-        }
+        # осыпание цепочки идёт по таймеру, чтобы не останавливать цикл событий: ход делается сразу,
+        # а падающие клетки рисуются в промежуточных положениях, перерисовываются только они
+        self._collapse = None
+        self._collapse_start = 0.0
+        self._collapse_timer = QTimer(self)
+        self._collapse_timer.setTimerType(Qt.PreciseTimer)
+        self._collapse_timer.setInterval(self.FRAME_INTERVAL)
+        self._collapse_timer.timeout.connect(self._on_collapse_tick)
+
+        self._images = PixmapCache(os.path.join(RESOURCE_DIR, 'images'))
+        self._paint_whole = False  # поле рисует _paint_board, а не QTableView через делегат
+        self._lod = False
+        self._lod_colors = LOD_COLORS + (LOD_ACTIVE_COLOR,) * len(LOD_COLORS)
+        self._lod_table = [color.rgb() for color in self._lod_colors]
+
+        # подсказка для текущего поля считается в фоне после каждого изменения поля
+        self._hints = HintEngine(parent=self)
+        self._hints.hint_ready.connect(self._on_hint_ready)
+        self._hint = None
+        self._hint_wanted = False
+        self._hint_cells = frozenset()
 
         self._game = Game()
+        # проверенные поля готовятся в фоне, новая игра берёт готовое поле, не дожидаясь генерации
+        self._board_pool = BoardPool()
+        self._board_pool.prefill(self._game.row_count, self._game.col_count, self._game.min_chain_len)
+        self._board_pool.start()
+        self._calibration = None  # создаётся при первом открытии диалога размеров
+        self._model = GameModel(self._game, self)
+        self.tableView.setModel(self._model)
         self._game_resize(self._game)
 
         class MyDelegate(QItemDelegate):
@@ -98,31 +218,45 @@ class MainWindow(QMainWindow, MainWindowUI):
         self.tableView.setItemDelegate(MyDelegate(self))
         self.tableView.setShowGrid(False)
 
+        # пока идёт осыпание, нажатия и движения мыши отбрасываются
+        stats = self._stats
+
         def new_mouse_press_event(e: QMouseEvent) -> None:
+            if self.is_collapsing:
+                return
             idx = self.tableView.indexAt(e.pos())
-            print('press row = {}, column = {}'.format(idx.row(), idx.column()))
+            stats.count('mouse_press')
+            if stats.tracing:
+                stats.trace('press', idx.row(), idx.column())
             self._game.on_mouse_press((idx.row(), idx.column()))
             self._update_view()
 
         def new_mouse_release_event(e: QMouseEvent) -> None:
+            if self.is_collapsing:
+                return
             idx = self.tableView.indexAt(e.pos())
-            print('release row = {}, column = {}'.format(idx.row(), idx.column()))
-
-            for _ in self._game.step_down_generator():
-                self._update_view()
-                sleep(self.sleep_time)
-            self._game.update_past_mouse_release()
-            self._update_view()
+            stats.count('mouse_release')
+            if stats.tracing:
+                stats.trace('release', idx.row(), idx.column())
+            self._start_collapse()
 
         def new_mouse_move_event(e: QMouseEvent) -> None:
+            if self.is_collapsing:
+                return
             idx = self.tableView.indexAt(e.pos())
-            print('move row = {}, column = {}'.format(idx.row(), idx.column()))
-            if self._game.on_mouse_move((idx.row(), idx.column())):
+            if stats.tracing:
+                stats.trace('move', idx.row(), idx.column())
+            start = perf_counter()
+            changed = self._game.on_mouse_move((idx.row(), idx.column()))
+            self._move_time.add(perf_counter() - start)
+            if changed:
                 self._update_view()
 
         self.tableView.mousePressEvent = new_mouse_press_event
         self.tableView.mouseMoveEvent = new_mouse_move_event
         self.tableView.mouseReleaseEvent = new_mouse_release_event
+        # подменяется сразу: PyQt запоминает, что метода на Python нет, после первого вызова из Qt
+        self.tableView.paintEvent = self._paint_table
 
         # обработка нажатий на кнопки и меню бар
 
@@ -132,6 +266,11 @@ class MainWindow(QMainWindow, MainWindowUI):
         self.sleep_menu_item.triggered.connect(self.on_sleep_menu_item)
         self.game_field_size.triggered.connect(self.on_game_field_size)
         self.game_rule.triggered.connect(self.on_game_rule)
+        self.undo_action.triggered.connect(self.on_undo)
+        self.redo_action.triggered.connect(self.on_redo)
+        self.hint_action.triggered.connect(self.on_hint)
+        self.profile_action.toggled.connect(self.on_profile)
+        self.save_stats_action.triggered.connect(self.on_save_stats)
 
         self._new_game()
 
@@ -139,6 +278,8 @@ class MainWindow(QMainWindow, MainWindowUI):
         return self._cell_size
 
     def set_cell_size(self, size):
+        if size != self._cell_size:
+            self._images.clear()
         self._cell_size = size
 
     cell_size = property(get_cell_size, set_cell_size)
@@ -147,6 +288,22 @@ class MainWindow(QMainWindow, MainWindowUI):
     def game(self):
         return self._game
 
+    @property
+    def board_pool(self) -> BoardPool:
+        return self._board_pool
+
+    @property
+    def instruments(self) -> Instruments:
+        return self._stats
+
+    @property
+    def calibration(self) -> 'CalibrationService':
+        # модуль калибровки тянет за собой multiprocessing, поэтому загружается только по требованию
+        if self._calibration is None:
+            from Calibration import CalibrationService
+            self._calibration = CalibrationService(parent=self)
+        return self._calibration
+
     def get_sleep_time(self):
         return self._sleep_time
 
@@ -155,23 +312,95 @@ class MainWindow(QMainWindow, MainWindowUI):
 
     sleep_time = property(get_sleep_time, set_sleep_time)
 
+    @property
+    def is_collapsing(self) -> bool:
+        return self._collapse is not None
+
+    def _start_collapse(self):
+        self._hints.cancel()
+        self._hide_hint()
+        plan = self._game.apply_active_chain()
+        if plan is None:
+            self._game.update_past_mouse_release()
+            self._update_view()
+            return
+        self._collapse = FallAnimation(plan)
+        self._collapse_start = perf_counter()
+        self._model.cells_changed(self._collapse.cells())
+        self._collapse_timer.start()
+
+    def _on_collapse_tick(self):
+        # один кадр осыпания; после последнего кадра ход завершается
+        start = perf_counter()
+        collapse = self._collapse
+        self._model.cells_changed(collapse.advance((start - self._collapse_start) / self.sleep_time))
+        self._step_time.add(perf_counter() - start)
+        if collapse.done:
+            self._stop_collapse()
+            self._game.update_past_mouse_release()
+            self._board_changed()
+            self._update_view()
+
+    def _stop_collapse(self):
+        self._collapse_timer.stop()
+        self._collapse = None
+
+    def _board_changed(self):
+        # прежняя подсказка больше не годится, новая считается для нового поля;
+        # на больших полях - только по запросу, чтобы фоновый поиск не отнимал время у отрисовки
+        self._hide_hint()
+        self._hint = None
+        if self._game.state == GameState.PLAYING and not self.is_large_board:
+            self._hints.request(self._game)
+        else:
+            self._hints.cancel()
+
+    def _on_hint_ready(self, hint):
+        if hint.generation != self._hints.generation:
+            return
+        self._hint = hint
+        if self._hint_wanted:
+            self._show_hint()
+
+    def _show_hint(self):
+        self._hint_wanted = False
+        hint = self._hint
+        if hint.chain is None:
+            self.statusbar.showMessage('Ходов нет' if hint.complete else 'Подсказка не найдена за отведённое время')
+            return
+        self._hint_cells = frozenset(hint.chain)
+        self._model.cells_changed(self._hint_cells)
+        budget = 'за {:.0f} мс'.format(hint.budget * 1000) if hint.budget else 'не уложилась в бюджет'
+        self.statusbar.showMessage('Подсказка: рыцарь опустится на {}, оценено цепочек: {}, {}'.format(
+            hint.score, hint.candidates, budget))
+
+    def _hide_hint(self):
+        self._hint_wanted = False
+        if self._hint_cells:
+            self._model.cells_changed(self._hint_cells)
+            self._hint_cells = frozenset()
+            self.statusbar.clearMessage()
+
     def _resize_table(self):
-        self.tableView.horizontalHeader().setDefaultSectionSize(self.cell_size)
-        self.tableView.verticalHeader().setDefaultSectionSize(self.cell_size)
+        for header in (self.tableView.horizontalHeader(), self.tableView.verticalHeader()):
+            header.setMinimumSectionSize(min(self.cell_size, header.minimumSectionSize()))
+            header.setDefaultSectionSize(self.cell_size)
 
     def _game_resize(self, game: Game) -> None:
-        model = QStandardItemModel(game.row_count, game.col_count)
-        self.tableView.setModel(model)
+        self._update_render_mode()
+        self._model.refresh()
         self._update_view()
 
     def _update_view(self):
-        self.tableView.viewport().update()
-        self.tableView.update()
+        start = perf_counter()
+        self._model.cells_changed(self._game.take_dirty_cells())
+        self.undo_action.setEnabled(self._game.can_undo)
+        self.redo_action.setEnabled(self._game.can_redo)
         self.lcdNumber.display(self._time)
+        self._update_time.add(perf_counter() - start)
         if self._game.state != GameState.PLAYING:
             self._timer.stop()
             self._end_game()
-        self.repaint()
 
     def _end_game(self):
         msg_box = QMessageBox()
@@ -186,8 +415,24 @@ class MainWindow(QMainWindow, MainWindowUI):
             self.close()
 
     def _new_game(self):
-        self._game.new_game()
-        self._game_resize(self._game)
+        self._stop_collapse()
+        game = self._game
+        # большие поля не проверяются: проверка одного поля 100x100 занимает секунды
+        board = None if self.is_large_board else self._board_pool.take(game.row_count, game.col_count,
+                                                                     game.min_chain_len)
+        game.new_game(board.seed if board is not None else None)
+        self._game_resize(game)
+        self._board_changed()
+        if self.is_large_board:
+            self.statusbar.showMessage('Большое поле: проверка и подсказки в фоне отключены')
+        elif board is None and self._board_pool.gave_up(game.row_count, game.col_count, game.min_chain_len):
+            self.statusbar.showMessage('Поле не проверено: для такого размера подходящие поля не находятся')
+        elif board is None:
+            self.statusbar.showMessage('Поле не проверено: готовых полей пока нет')
+        elif board.exact:
+            self.statusbar.showMessage('Поле проверено: кратчайший выигрыш за {} ходов'.format(board.moves))
+        else:
+            self.statusbar.showMessage('Поле проверено: выигрыш не более чем за {} ходов'.format(board.moves))
         self._time = 0
         self._update_view()
         self._timer.start()
@@ -200,27 +445,152 @@ class MainWindow(QMainWindow, MainWindowUI):
         self.lcdNumber.display(min(self._time, 999))
 
     def on_item_paint(self, e: QModelIndex, painter: QPainter, option: QStyleOptionViewItem) -> None:
-        item = self._game[e.row(), e.column()]
-        if item.contents == CellContents.PRINCESS:
-            img = self._images['princess']
-        elif item.contents == CellContents.KNIGHT:
-            img = self._images['knight']
-        elif item.contents == CellContents.CIRCLE:
-            name = 'circle' if not item.is_active else 'active_circle'
-            img = self._images[name]
-        elif item.contents == CellContents.SQUARE:
-            name = 'square' if not item.is_active else 'active_square'
-            img = self._images[name]
-        elif item.contents == CellContents.TRIANGLE:
-            name = 'triangle' if not item.is_active else 'active_triangle'
-            img = self._images[name]
+        start = perf_counter()
+        self._paint_cell(painter, e.row(), e.column(), option.rect)
+        self._paint_time.add(perf_counter() - start)
+
+    def _paint_cell(self, painter: QPainter, r: int, c: int, rect: QRect) -> None:
+        falling = self._collapse.covering((r, c)) if self._collapse is not None else None
+        if falling is not None:
+            self._paint_falling(painter, r, c, rect, falling)
+        else:
+            item = self._game[r, c]
+            self._paint_contents(painter, rect.left(), rect.top(), rect, item.contents, item.is_active)
+        if (r, c) in self._hint_cells:
+            painter.fillRect(rect, self.HINT_COLOR)
+
+    def _paint_contents(self, painter: QPainter, x: int, y: int, rect: QRect, contents, is_active) -> None:
+        if self._lod:
+            painter.fillRect(x, y, rect.width(), rect.height(), self._lod_colors[contents.value + 6 * is_active])
+            return
+        pixmap = self._images.pixmap(IMAGE_NAMES[contents, is_active], rect.width(), rect.height(),
+                                     self.tableView.viewport().devicePixelRatioF())
+        painter.drawPixmap(x, y, pixmap)
+
+    def _paint_falling(self, painter: QPainter, r: int, c: int, rect: QRect, falling) -> None:
+        # клетка в падающем столбце: пустой фон и части падающих клеток, обрезанные по клетке
+        self._paint_contents(painter, rect.left(), rect.top(), rect, CellContents.EMPTY, False)
+        painter.save()
+        painter.setClipRect(rect)
+        for end_row, row in falling:
+            self._paint_contents(painter, rect.left(), rect.top() + round((row - r) * rect.height()), rect,
+                                 self._game[end_row, c].contents, False)
+        painter.restore()
+
+    def _paint_table(self, e: QPaintEvent) -> None:
+        if self._paint_whole:
+            self._paint_board(e)
+        else:
+            QTableView.paintEvent(self.tableView, e)
+
+    def _paint_board(self, e: QPaintEvent) -> None:
+        # большое поле: видимая часть одним проходом без делегата; при мелких клетках (self._lod)
+        # поле рисуется одной картинкой по пикселю на клетку, растянутой до размера клеток
+        start = perf_counter()
+        view, game, size = self.tableView, self._game, self.cell_size
+        dx, dy, rect = view.horizontalOffset(), view.verticalOffset(), e.rect()
+        c0, c1 = max((rect.left() + dx) // size, 0), min((rect.right() + dx) // size + 1, game.col_count)
+        r0, r1 = max((rect.top() + dy) // size, 0), min((rect.bottom() + dy) // size + 1, game.row_count)
+        if r0 >= r1 or c0 >= c1:
+            return
+        painter = QPainter(view.viewport())
+        if self._lod:
+            image, data = self._board_image(r0, r1, c0, c1)
+            painter.drawImage(QRect(c0 * size - dx, r0 * size - dy, (c1 - c0) * size, (r1 - r0) * size), image)
+        else:
+            contents, active, cols = game.board.contents_buffer, game.board.active_buffer, game.col_count
+            pixmaps = dict()
+            ratio = view.viewport().devicePixelRatioF()
+            for r in range(r0, r1):
+                y, i = r * size - dy, r * cols
+                for c in range(c0, c1):
+                    key = (contents[i + c], active[i + c])
+                    pixmap = pixmaps.get(key)
+                    if pixmap is None:
+                        pixmap = pixmaps[key] = self._images.pixmap(
+                            IMAGE_NAMES[CellContents(key[0]), bool(key[1])], size, size, ratio)
+                    painter.drawPixmap(c * size - dx, y, pixmap)
+        # поверх - падающие клетки и подсказка
+        special = set(rc for rc in self._hint_cells if r0 <= rc[0] < r1 and c0 <= rc[1] < c1)
+        if self._collapse is not None:
+            for c, depth in self._collapse.depths.items():
+                if c0 <= c < c1:
+                    special.update((r, c) for r in range(r0, min(r1, depth)))
+        for r, c in special:
+            self._paint_cell(painter, r, c, QRect(c * size - dx, r * size - dy, size, size))
+        painter.end()
+        self._board_paint_time.add(perf_counter() - start)
+
+    def _board_image(self, r0: int, r1: int, c0: int, c1: int):
+        # строки r0..r1-1, столбцы c0..c1-1 поля: индекс цвета = содержимое + 6 для выделенных клеток.
+        # Сложение через большие целые не даёт переносов: индекс не больше 11
+        board, cols, width = self._game.board, self._game.col_count, c1 - c0
+        starts = range(r0 * cols + c0, r1 * cols, cols)
+        contents, active = board.contents_buffer, board.active_buffer
+        cells = b''.join(contents[i:i + width] for i in starts)
+        marks = b''.join(active[i:i + width] for i in starts)
+        data = (int.from_bytes(cells, 'big') + 6 * int.from_bytes(marks, 'big')).to_bytes(len(cells), 'big')
+        image = QImage(data, width, r1 - r0, width, QImage.Format_Indexed8)
+        image.setColorTable(self._lod_table)
+        return image, data  # QImage не копирует data, она должна жить, пока картинка рисуется
+
+    @property
+    def is_large_board(self) -> bool:
+        return self._game.row_count * self._game.col_count >= self.LARGE_BOARD_CELLS
+
+    def _update_render_mode(self) -> None:
+        # крупные поля и мелкие клетки рисуются одним проходом paintEvent вместо делегата
+        whole = self.is_large_board or self.cell_size < self.LOD_CELL_SIZE
+        self._lod = self.cell_size < self.LOD_CELL_SIZE
+        if whole != self._paint_whole:
+            self._paint_whole = whole
+            self.tableView.viewport().update()
+
+    def on_undo(self) -> None:
+        if not self.is_collapsing and self._game.undo():
+            self._board_changed()
+            self._update_view()
+
+    def on_redo(self) -> None:
+        if not self.is_collapsing and self._game.redo():
+            self._board_changed()
+            self._update_view()
+
+    def on_hint(self) -> None:
+        if self.is_collapsing or self._game.state != GameState.PLAYING:
+            return
+        if self._hint is None:
+            if self.is_large_board and not self._hint_wanted:
+                self._hints.request(self._game)
+            self._hint_wanted = True  # покажется, когда придёт из фонового потока
+            self.statusbar.showMessage('Подсказка ищется...')
         else:
-            img = self._images['closed']
-        img.render(painter, QRectF(option.rect))
+            self._show_hint()
 
     def on_quit(self) -> None:
         self.close()
 
+    def closeEvent(self, e) -> None:
+        self._board_pool.stop()
+        if self._calibration is not None:
+            self._calibration.stop()
+        if self.stats_file:
+            self._stats.dump(self.stats_file)
+        super().closeEvent(e)
+
+    def on_profile(self, checked: bool) -> None:
+        if checked:
+            self._stats.start_profile()
+            self.statusbar.showMessage('Профилирование включено')
+        else:
+            self._stats.stop_profile()
+            self.statusbar.showMessage('Профиль записан в статистику')
+
+    def on_save_stats(self) -> None:
+        path, _ = QFileDialog.getSaveFileName(self, 'Сохранить статистику', 'stats.json', 'JSON (*.json)')
+        if path:
+            self._stats.dump(path)
+
     def on_game_field_size(self) -> None:
         dialog = FieldSizeDialog(self)
         dialog.exec()
@@ -239,10 +609,13 @@ class MainWindow(QMainWindow, MainWindowUI):
         msg_box.setIcon(QMessageBox.Information)
         msg_box.setWindowTitle("Правила игры")
         msg_box.setStandardButtons(QMessageBox.Ok)
-
-        def get_text(file_name):
-            with open(file_name, encoding="UTF-8") as file:
-                return file.read()
-
-        msg_box.setText(get_text(MainWindow.GAME_RULE_FILE))
-        msg_box.exec()
\ No newline at end of file
+        msg_box.setText(MainWindow.game_rules())
+        msg_box.exec()
+
+    @classmethod
+    def game_rules(cls) -> str:
+        # файл правил читается один раз
+        if cls._game_rules is None:
+            with open(cls.GAME_RULE_FILE, encoding="UTF-8") as file:
+                cls._game_rules = file.read()
+        return cls._game_rules
\ No newline at end of file
@@ -0,0 +1,233 @@
+from typing import List, Tuple
+
+from Game import CellContents, Game
+
+SHAPES = (CellContents.SQUARE, CellContents.CIRCLE, CellContents.TRIANGLE)
+DEFAULT_CHAIN_LIMIT = 256
+DEFAULT_CELL_SET_LIMIT = 4096
+DEFAULT_SEARCH_BUDGET = 100000  # шагов поиска в глубину на одну компоненту
+WINDOW_ROWS = 4  # заливка сначала идёт в полосе +-WINDOW_ROWS строк вокруг затравки
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+popcount = getattr(int, 'bit_count', _popcount)  # int.bit_count есть начиная с Python 3.10
+
+
+class MoveGenerator:
+    # поле в виде битовых масок, по одной на каждую фигуру; бит клетки (r, c) имеет номер
+    # r * width + c, где width = col_count + 1: лишний нулевой столбец не даёт сдвигам
+    # влево-вправо перескакивать на соседнюю строку
+
+    def __init__(self, game: Game, search_budget: int = DEFAULT_SEARCH_BUDGET) -> None:
+        self._row_count = game.row_count
+        self._col_count = game.col_count
+        self._width = game.col_count + 1
+        self._min_chain_len = max(game.min_chain_len, 1)
+        self._search_budget = search_budget
+        self._masks = self._build_masks(game.board.contents_buffer)
+        self._components = None
+
+    def _build_masks(self, contents: bytearray):
+        cols, guard = self._col_count, bytes([CellContents.EMPTY.value])
+        padded = guard.join(contents[r * cols:(r + 1) * cols] for r in range(self._row_count)) + guard
+        masks = dict()
+        for shape in SHAPES:
+            table = bytearray(b'0' * 256)
+            table[shape.value] = ord('1')
+            masks[shape] = int(padded.translate(table)[::-1], 2)
+        return masks
+
+    @property
+    def masks(self):
+        return self._masks
+
+    def _neighbours(self, mask: int) -> int:
+        w = self._width
+        return (mask << 1) | (mask >> 1) | (mask << w) | (mask >> w)
+
+    def flood_fill(self, seed: int, mask: int) -> int:
+        # связная компонента mask, содержащая биты seed
+        component = seed
+        while True:
+            grown = (component | self._neighbours(component)) & mask
+            if grown == component:
+                return component
+            component = grown
+
+    def _component_at(self, bit: int, mask: int) -> Tuple[int, int]:
+        # большинство компонент маленькие, поэтому сначала заливаем узкую полосу строк:
+        # операции над коротким числом дешевле, чем над маской всего поля
+        w, last_row = self._width, self._row_count - 1
+        row = bit // w
+        top, bottom = max(row - WINDOW_ROWS, 0), min(row + WINDOW_ROWS, last_row)
+        shift = top * w
+        window = (mask >> shift) & ((1 << (bottom - top + 1) * w) - 1)
+        component = self.flood_fill(1 << (bit - shift), window)
+        row_bits, edge = (1 << w) - 1, 0
+        if top > 0:
+            edge |= row_bits
+        if bottom < last_row:
+            edge |= row_bits << (bottom - top) * w
+        if component & edge:
+            component, shift = self.flood_fill(1 << bit, mask), 0
+        return component << shift, popcount(component)
+
+    def _core(self, mask: int) -> int:
+        # клетки, у которых не меньше двух соседей той же фигуры
+        w = self._width
+        left, right = (mask << 1) & mask, (mask >> 1) & mask
+        up, down = (mask << w) & mask, (mask >> w) & mask
+        return (left & (right | up | down)) | (right & (up | down)) | (up & down)
+
+    def _seeds(self, mask: int) -> int:
+        # клетки, с которых стоит начинать заливку: в любой компоненте из трёх и более клеток
+        # есть клетка с двумя соседями, а в компоненте из двух - клетка с соседом
+        if self._min_chain_len >= 3:
+            return self._core(mask)
+        if self._min_chain_len == 2:
+            return mask & self._neighbours(mask)
+        return mask
+
+    def components(self) -> List[Tuple[CellContents, int, int]]:
+        # компоненты из не менее чем min_chain_len одинаковых фигур (кандидаты на ход)
+        # в виде троек (фигура, маска, размер)
+        if self._components is None:
+            self._components = list()
+            for shape, mask in self._masks.items():
+                remaining = self._seeds(mask)
+                while remaining:
+                    low = remaining & -remaining
+                    component, size = self._component_at(low.bit_length() - 1, mask)
+                    remaining &= ~component
+                    if size >= self._min_chain_len:
+                        self._components.append((shape, component, size))
+        return self._components
+
+    def count_components(self) -> int:
+        return len(self.components())
+
+    def cells(self, mask: int) -> List[Tuple[int, int]]:
+        result, w = list(), self._width
+        while mask:
+            low = mask & -mask
+            result.append(divmod(low.bit_length() - 1, w))
+            mask ^= low
+        return result
+
+    def mask(self, cells) -> int:
+        result, w = 0, self._width
+        for r, c in cells:
+            result |= 1 << (r * w + c)
+        return result
+
+    def _paths(self, component: int, length: int, limit: int, seen: set, starts: int = None):
+        # простые пути из length клеток внутри компоненты, по одному на каждый набор клеток;
+        # пути начинаются с клеток starts, по умолчанию - с любой клетки компоненты
+        w, budget = self._width, [self._search_budget]
+        steps = (1, -1, w, -w)
+
+        def extend(path, path_mask):
+            if len(path) == length:
+                if path_mask not in seen:
+                    seen.add(path_mask)
+                    yield path
+                return
+            last = path[-1]
+            for step in steps:
+                nxt = last + step
+                if nxt >= 0 and component >> nxt & 1 and not path_mask >> nxt & 1:
+                    budget[0] -= 1
+                    if budget[0] < 0:
+                        return
+                    yield from extend(path + [nxt], path_mask | 1 << nxt)
+
+        bits = component if starts is None else component & starts
+        while bits and len(seen) < limit and budget[0] >= 0:
+            low = bits & -bits
+            bits ^= low
+            start = low.bit_length() - 1
+            for path in extend([start], low):
+                yield [divmod(i, w) for i in path]
+                if len(seen) >= limit:
+                    return
+
+    def chains(self, limit: int = DEFAULT_CHAIN_LIMIT, length: int = None,
+               touching: int = None) -> List[List[Tuple[int, int]]]:
+        # допустимые цепочки; если задана маска touching, то только начинающиеся в её клетках
+        length = max(length or self._min_chain_len, self._min_chain_len)
+        chains, seen = list(), set()
+        for _, component, size in self.components():
+            if size < length or (touching is not None and not component & touching):
+                continue
+            chains.extend(self._paths(component, length, limit, seen, touching))
+            if len(chains) >= limit:
+                break
+        return chains[:limit]
+
+    def component_chains(self, component: int, limit: int = DEFAULT_CHAIN_LIMIT,
+                         length: int = None) -> List[List[Tuple[int, int]]]:
+        length = max(length or self._min_chain_len, self._min_chain_len)
+        return list(self._paths(component, length, limit, set()))
+
+    def cell_sets(self, limit: int = DEFAULT_CELL_SET_LIMIT, covering: int = None):
+        # все наборы клеток, которые убираются одним ходом, по одной цепочке на набор: результат хода
+        # зависит только от набора. Обход по состояниям (набор, последняя клетка), каждое - один раз;
+        # covering - только наборы, содержащие все клетки этой маски.
+        # Возвращает (цепочки, полный ли перебор): перебор обрывается на limit наборах или по бюджету
+        w, min_len = self._width, self._min_chain_len
+        steps, budget = (1, -1, w, -w), self._search_budget
+        chains, seen = list(), set()
+        for _, component, _ in self.components():
+            if covering is not None and covering & ~component:
+                continue
+            states, stack, bits = set(), list(), component
+            while bits:
+                low = bits & -bits
+                bits ^= low
+                stack.append((low, low.bit_length() - 1, 1))
+            paths = {(low, i): (i,) for low, i, _ in stack}
+            while stack:
+                mask, last, size = stack.pop()
+                states.add((mask, last))
+                budget -= 1
+                if budget < 0:
+                    return chains, False
+                path = paths.pop((mask, last))
+                if size >= min_len and mask not in seen and (covering is None or not covering & ~mask):
+                    seen.add(mask)
+                    chains.append([divmod(i, w) for i in path])
+                    if len(chains) >= limit:
+                        return chains, False
+                for step in steps:
+                    nxt = last + step
+                    if nxt >= 0 and component >> nxt & 1 and not mask >> nxt & 1:
+                        key = (mask | 1 << nxt, nxt)
+                        if key not in states and key not in paths:
+                            paths[key] = path + (nxt,)
+                            stack.append((key[0], nxt, size + 1))
+        return chains, True
+
+    def combo(self, length: int = None) -> List[List[Tuple[int, int]]]:
+        # по одной цепочке из каждой компоненты: компоненты не пересекаются, поэтому
+        # цепочки можно сделать одним ходом через Game.apply_chains
+        length = max(length or self._min_chain_len, self._min_chain_len)
+        combo = list()
+        for _, component, size in self.components():
+            if size >= length:
+                chain = next(self._paths(component, length, 1, set()), None)
+                if chain is not None:
+                    combo.append(chain)
+        return combo
+
+    def count_chains(self, limit: int = DEFAULT_CHAIN_LIMIT, length: int = None) -> int:
+        return len(self.chains(limit, length))
+
+    def has_move(self) -> bool:
+        if self._min_chain_len <= 3:
+            # путь из трёх клеток есть ровно тогда, когда у какой-то клетки два соседа той же фигуры
+            return any(self._seeds(mask) for mask in self._masks.values())
+        return any(next(self._paths(component, self._min_chain_len, 1, set()), None) is not None
+                   for _, component, _ in self.components())
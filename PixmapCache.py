@@ -0,0 +1,53 @@
+import os
+from typing import TYPE_CHECKING
+
+from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtGui import QPainter, QPixmap
+
+if TYPE_CHECKING:
+    from PyQt5.QtSvg import QSvgRenderer
+
+
+class PixmapCache:
+    # растеризованные SVG из папки images, ключ - (имя, ширина, высота, device pixel ratio).
+    # Файл разбирается при первом обращении к картинке, QtSvg загружается вместе с первым из них
+    EXTENSION = '.svg'
+
+    def __init__(self, images_dir: str) -> None:
+        self._images_dir = images_dir
+        self._renderers = dict()
+        self._pixmaps = dict()
+
+    def renderer(self, name: str) -> 'QSvgRenderer':
+        renderer = self._renderers.get(name)
+        if renderer is None:
+            from PyQt5.QtSvg import QSvgRenderer
+            path = os.path.join(self._images_dir, name + self.EXTENSION)
+            if not os.path.isfile(path):
+                raise KeyError(name)
+            renderer = self._renderers[name] = QSvgRenderer(path)
+        return renderer
+
+    @property
+    def loaded(self) -> int:
+        # сколько SVG уже разобрано
+        return len(self._renderers)
+
+    def pixmap(self, name: str, width: int, height: int, ratio: float = 1.0) -> QPixmap:
+        key = (name, width, height, ratio)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(round(width * ratio), round(height * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            self.renderer(name).render(painter, QRectF(0, 0, width, height))
+            painter.end()
+            self._pixmaps[key] = pixmap
+        return pixmap
+
+    def clear(self) -> None:
+        self._pixmaps.clear()
+
+    def __len__(self) -> int:
+        return len(self._pixmaps)
@@ -0,0 +1,290 @@
+import argparse
+from typing import List, Tuple
+
+from Game import CellContents, Game
+
+# Файл партий: MAGIC, затем записи "varint длина + партия". Партия:
+#   varint: row_count, col_count, min_chain_len, seed, позиция генератора досыпки,
+#           индекс рыцаря + 1, индекс принцессы + 1 (0 - фигуры нет на поле)
+#   поле по 2 бита на клетку: фигуры 0..2, рыцарь и принцесса - 3
+#   ходы до конца записи: varint длина цепочки, varint индекс первой клетки,
+#           направления шагов по 2 бита (DIRECTIONS)
+MAGIC = b'GCR\x01'
+DIRECTIONS = ((-1, 0), (0, 1), (1, 0), (0, -1))
+_DIRECTION_CODES = {d: code for code, d in enumerate(DIRECTIONS)}
+_STEPS = [tuple(DIRECTIONS[byte >> (2 * k) & 3] for k in range(4)) for byte in range(256)]  # байт -> 4 шага
+_FIGURE = 3
+_TO_2BIT = bytes(min(v, _FIGURE) for v in range(256))
+
+
+def write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    # возвращает (значение, позиция после него)
+    value = data[pos]
+    if value < 0x80:
+        return value, pos + 1
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def pack2(values: bytes) -> bytes:
+    # значения 0..3 по четыре в байт; сдвиг целого числа сдвигает каждый байт отдельно,
+    # потому что ни одно значение не выходит за свои два бита
+    values = bytes(values) + bytes(-len(values) % 4)
+    size = len(values) // 4
+    packed = 0
+    for k in range(4):
+        packed |= int.from_bytes(values[k::4], 'little') << (2 * k)
+    return packed.to_bytes(size, 'little')
+
+
+def unpack2(data: bytes, count: int) -> bytes:
+    size = len(data)
+    packed, mask = int.from_bytes(data, 'little'), int.from_bytes(b'\x03' * size, 'little')
+    values = bytearray(size * 4)
+    for k in range(4):
+        values[k::4] = ((packed >> (2 * k)) & mask).to_bytes(size, 'little')
+    return bytes(values[:count])
+
+
+class ReplayHeader:
+    # начальная позиция партии
+    __slots__ = ('row_count', 'col_count', 'min_chain_len', 'seed', 'random_position', 'contents')
+
+    def __init__(self, row_count: int, col_count: int, min_chain_len: int, seed: int,
+                 random_position: int, contents: bytes) -> None:
+        self.row_count = row_count
+        self.col_count = col_count
+        self.min_chain_len = min_chain_len
+        self.seed = seed
+        self.random_position = random_position
+        self.contents = contents
+
+    @staticmethod
+    def of(game: Game) -> 'ReplayHeader':
+        return ReplayHeader(game.row_count, game.col_count, game.min_chain_len, game.seed,
+                            game.random.position, bytes(game.board.contents_buffer))
+
+    def game(self, **kwargs) -> Game:
+        game = Game(self.row_count, self.col_count, self.min_chain_len, self.seed, **kwargs)
+        game.load_board(self.contents, self.random_position)
+        return game
+
+    def encode(self, out: bytearray) -> None:
+        contents = self.contents
+        for value in (self.row_count, self.col_count, self.min_chain_len, self.seed, self.random_position,
+                      contents.find(CellContents.KNIGHT.value) + 1, contents.find(CellContents.PRINCESS.value) + 1):
+            write_varint(out, value)
+        out += pack2(contents.translate(_TO_2BIT))
+
+    @staticmethod
+    def decode(data: bytes, pos: int = 0) -> Tuple['ReplayHeader', int]:
+        values = list()
+        for _ in range(7):
+            value, pos = read_varint(data, pos)
+            values.append(value)
+        row_count, col_count, min_chain_len, seed, random_position, knight, princess = values
+        count = row_count * col_count
+        end = pos + (count + 3) // 4
+        contents = bytearray(unpack2(data[pos:end], count))
+        if knight:
+            contents[knight - 1] = CellContents.KNIGHT.value
+        if princess:
+            contents[princess - 1] = CellContents.PRINCESS.value
+        return ReplayHeader(row_count, col_count, min_chain_len, seed, random_position, bytes(contents)), end
+
+
+def encode_chain(out: bytearray, chain, col_count: int) -> None:
+    # цепочки короткие, поэтому направления пакуются по таблице, без pack2
+    write_varint(out, len(chain))
+    r, c = chain[0]
+    write_varint(out, r * col_count + c)
+    codes = [_DIRECTION_CODES[r1 - r0, c1 - c0] for (r0, c0), (r1, c1) in zip(chain, chain[1:])]
+    codes += (0, 0, 0)
+    out += bytes(codes[k] | codes[k + 1] << 2 | codes[k + 2] << 4 | codes[k + 3] << 6
+                 for k in range(0, len(chain) - 1, 4))
+
+
+def decode_chain(data: bytes, pos: int, col_count: int) -> Tuple[List[Tuple[int, int]], int]:
+    length, pos = read_varint(data, pos)
+    start, pos = read_varint(data, pos)
+    end = pos + (length + 2) // 4
+    r, c = divmod(start, col_count)
+    chain = [(r, c)]
+    steps = list()
+    for byte in data[pos:end]:
+        steps += _STEPS[byte]
+    for dr, dc in steps[:length - 1]:
+        r += dr
+        c += dc
+        chain.append((r, c))
+    return chain, end
+
+
+class Replay:
+    # партия: начальная позиция и цепочки ходов. Ходы с подменённой досыпкой (apply_chain(refill=...))
+    # так не воспроизвести: при повторе новые клетки берутся из генератора игры. Комбо-ходы и каскады
+    # (apply_chains) в формат не входят
+    def __init__(self, header: ReplayHeader, moves: List[List[Tuple[int, int]]]) -> None:
+        self.header = header
+        self.moves = moves
+
+    @staticmethod
+    def of(game: Game) -> 'Replay':
+        # сделанные ходы игры с начальной позицией, восстановленной через историю
+        start = game.copy()
+        start.goto(0)
+        records = game.moves[:game.turn]
+        for i, record in enumerate(records):
+            if record.is_combo or len(record.plans) > 1:
+                raise ValueError('move {} is a combo or cascade move, the format stores one chain per move'.format(i))
+        return Replay(ReplayHeader.of(start), [list(record.chain) for record in records])
+
+    def game(self, turn: int = None, **kwargs) -> Game:
+        # игра после первых turn ходов (по умолчанию всех)
+        game = self.header.game(**kwargs)
+        for i, chain in enumerate(self.moves[:turn]):
+            if game.apply_chain(chain) is None:
+                raise ValueError('move {} is not valid: {}'.format(i, chain))
+        return game
+
+    def encode(self) -> bytes:
+        out = bytearray()
+        self.header.encode(out)
+        for chain in self.moves:
+            encode_chain(out, chain, self.header.col_count)
+        return bytes(out)
+
+    @staticmethod
+    def decode(data: bytes) -> 'Replay':
+        header, pos = ReplayHeader.decode(data)
+        moves, col_count = list(), header.col_count
+        while pos < len(data):
+            chain, pos = decode_chain(data, pos, col_count)
+            moves.append(chain)
+        return Replay(header, moves)
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+
+class ReplayWriter:
+    # пишет партии в поток одну за другой; ходы текущей партии копятся до end()
+    def __init__(self, stream) -> None:
+        self._stream = stream
+        self._record = None
+        self._col_count = None
+        stream.write(MAGIC)
+
+    def begin(self, game: Game) -> None:
+        # начать партию с текущей позиции игры
+        self._record = bytearray()
+        self._col_count = game.col_count
+        ReplayHeader.of(game).encode(self._record)
+
+    def move(self, chain) -> None:
+        encode_chain(self._record, chain, self._col_count)
+
+    def end(self) -> None:
+        self.write_encoded(bytes(self._record))
+        self._record = None
+
+    def write_encoded(self, data: bytes) -> None:
+        # партия, уже закодированная Replay.encode(), например в другом процессе
+        size = bytearray()
+        write_varint(size, len(data))
+        self._stream.write(size)
+        self._stream.write(data)
+
+    def write(self, game: Game) -> None:
+        self.write_encoded(Replay.of(game).encode())
+
+
+class ReplayReader:
+    # читает партии из потока по одной, не загружая файл целиком
+    def __init__(self, stream) -> None:
+        self._stream = stream
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ValueError('not a replay file')
+
+    def _size(self):
+        value = shift = 0
+        while True:
+            byte = self._stream.read(1)
+            if not byte:
+                if shift:
+                    raise ValueError('truncated replay file')
+                return None
+            value |= (byte[0] & 0x7f) << shift
+            if byte[0] < 0x80:
+                return value
+            shift += 7
+
+    def read_encoded(self):
+        size = self._size()
+        if size is None:
+            return None
+        data = self._stream.read(size)
+        if len(data) != size:
+            raise ValueError('truncated replay file')
+        return data
+
+    def read(self):
+        data = self.read_encoded()
+        return None if data is None else Replay.decode(data)
+
+    def skip(self, count: int) -> int:
+        # пропускает count партий без разбора, возвращает число пропущенных
+        for skipped in range(count):
+            size = self._size()
+            if size is None:
+                return skipped
+            self._stream.seek(size, 1)
+        return count
+
+    def __iter__(self):
+        while True:
+            replay = self.read()
+            if replay is None:
+                return
+            yield replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Воспроизведение сохранённых партий')
+    parser.add_argument('path')
+    parser.add_argument('--game', type=int, default=0, help='номер партии в файле')
+    parser.add_argument('--turn', type=int, default=None, help='остановиться после этого хода')
+    args = parser.parse_args()
+
+    with open(args.path, 'rb') as f:
+        reader = ReplayReader(f)
+        reader.skip(args.game)
+        replay = reader.read()
+    if replay is None:
+        parser.error('no game {} in {}'.format(args.game, args.path))
+    header = replay.header
+    game = replay.game(args.turn)
+    print('game {}: {}x{}, min chain {}, seed {}, {} moves'.format(
+        args.game, header.row_count, header.col_count, header.min_chain_len, header.seed, len(replay)))
+    print('after move {}: {}, knight {}, princess {}'.format(game.turn, game.state.name, game.knight, game.princess))
+    symbols = 'SCTKP.'
+    contents = game.board.contents_buffer
+    for r in range(game.row_count):
+        print(''.join(symbols[v] for v in contents[r * game.col_count:(r + 1) * game.col_count]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import random as rnd
+
+from Game import Game, GameState
+from MoveGenerator import MoveGenerator
+
+DEFAULT_MAX_MOVES = 1000
+
+
+class GameResult:
+    def __init__(self, won: bool, moves: int, dead: bool) -> None:
+        self.won = won  # рыцарь дошёл до принцессы
+        self.moves = moves  # сделано ходов
+        self.dead = dead  # на поле не осталось допустимых цепочек
+
+    def __str__(self) -> str:
+        return 'won = {}, moves = {}, dead = {}'.format(self.won, self.moves, self.dead)
+
+
+class RandomPolicy:
+    name = 'random'
+    chains_per_component = 16
+
+    def choose(self, game: Game, moves: MoveGenerator, rng: rnd.Random):
+        components = moves.components()
+        if not components:
+            return None
+        _, component, _ = rng.choice(components)
+        chains = moves.component_chains(component, self.chains_per_component)
+        return rng.choice(chains) if chains else None
+
+
+class GreedyKnightPolicy(RandomPolicy):
+    # выбирает цепочку, убирающую больше всего клеток между рыцарем и принцессой
+    name = 'greedy'
+
+    def choose(self, game: Game, moves: MoveGenerator, rng: rnd.Random):
+        knight, princess = game.knight, game.princess
+        if knight is None or princess is None or knight[1] != princess[1]:
+            return super().choose(game, moves, rng)
+        column = knight[1]
+        chains = moves.chains(touching=moves.mask((r, column) for r in range(knight[0] + 1, princess[0])))
+        if not chains:
+            return super().choose(game, moves, rng)
+
+        def score(chain):
+            return sum(1 for r, c in chain if c == column and knight[0] < r < princess[0])
+
+        best = max(score(chain) for chain in chains)
+        return rng.choice([chain for chain in chains if score(chain) == best])
+
+
+POLICIES = {policy.name: policy for policy in (RandomPolicy, GreedyKnightPolicy)}
+
+
+def play(game: Game, policy, rng: rnd.Random, max_moves: int = DEFAULT_MAX_MOVES) -> GameResult:
+    moves = 0
+    while game.state == GameState.PLAYING and moves < max_moves:
+        generator = MoveGenerator(game)
+        chain = policy.choose(game, generator, rng) if generator.has_move() else None
+        if chain is None:
+            return GameResult(False, moves, True)
+        game.apply_chain(chain)
+        moves += 1
+    return GameResult(game.state == GameState.WIN, moves, False)
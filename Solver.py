@@ -0,0 +1,276 @@
+import argparse
+import random as rnd
+import time
+from collections import OrderedDict
+from enum import Enum
+
+from Game import CellContents, Game, GameState
+from MoveGenerator import MoveGenerator
+
+DEFAULT_MAX_DEPTH = 8
+DEFAULT_MAX_NODES = 200000
+DEFAULT_TT_SIZE = 1 << 18
+DEFAULT_BRANCH_LIMIT = 64  # цепочек на позицию в режиме expectimax
+DEFAULT_MOVE_LIMIT = 4096  # наборов клеток на позицию в solve; сверх этого перебор неполный
+DEAD_END_COST = 100  # оценка позиции без ходов в режиме expectimax
+ZOBRIST_SEED = 0x5eed
+
+
+class SolveStatus(Enum):
+    # при exact = False перебор ходов был неполным: выигрыш - лишь оценка сверху,
+    # а NOT_FOUND значит, что выигрыша нет только среди перебранных ходов
+    SOLVED = 0  # найден выигрыш, при exact - кратчайший
+    NOT_FOUND = 1  # в пределах max_depth выигрыша нет
+    BUDGET = 2  # поиск остановлен по числу узлов или времени
+
+
+class SolveResult:
+    def __init__(self, status: SolveStatus, moves=None, path=None, nodes: int = 0, elapsed: float = 0.0,
+                 exact: bool = False) -> None:
+        self.status = status
+        self.moves = moves  # число ходов, в режиме expectimax - ожидаемое
+        self.path = path  # цепочки найденного выигрыша
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.exact = exact  # перебраны все ходы в каждой позиции
+
+    def __str__(self) -> str:
+        return 'status = {}, moves = {}{}, nodes = {}, elapsed = {:.3f}s'.format(
+            self.status.name, '' if self.exact or self.moves is None else '<=', self.moves, self.nodes, self.elapsed)
+
+
+class Zobrist:
+    def __init__(self, size: int, seed: int = ZOBRIST_SEED) -> None:
+        rng = rnd.Random(seed)
+        kinds = len(CellContents)
+        self._keys = [rng.getrandbits(64) for _ in range(size * kinds)]
+        self._kinds = kinds
+
+    def hash(self, game: Game) -> int:
+        h, keys, kinds = 0, self._keys, self._kinds
+        for i, v in enumerate(game.board.contents_buffer):
+            h ^= keys[i * kinds + v]
+        return h
+
+    def update(self, h: int, before: Game, after: Game, plan) -> int:
+        # меняются только верхние drop.depth строк затронутых столбцов
+        keys, kinds, cols = self._keys, self._kinds, before.col_count
+        old, new = before.board.contents_buffer, after.board.contents_buffer
+        for drop in plan:
+            for i in range(drop.col, drop.depth * cols, cols):
+                if old[i] != new[i]:
+                    h ^= keys[i * kinds + old[i]] ^ keys[i * kinds + new[i]]
+        return h
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+class Solver:
+    # кратчайший выигрыш поиском с итеративным углублением и таблицей транспозиций. В каждой позиции
+    # перебираются все наборы клеток, убираемые одним ходом; если их больше move_limit, перебор
+    # неполный и найденный выигрыш - только оценка сверху (SolveResult.exact = False)
+
+    def __init__(self, max_depth: int = DEFAULT_MAX_DEPTH, max_nodes: int = DEFAULT_MAX_NODES,
+                 time_limit: float = None, tt_size: int = DEFAULT_TT_SIZE,
+                 branch_limit: int = DEFAULT_BRANCH_LIMIT, seed: int = 0, move_limit: int = DEFAULT_MOVE_LIMIT) -> None:
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.tt_size = tt_size
+        self.branch_limit = branch_limit
+        self.move_limit = move_limit
+        self.seed = seed
+        self._table = OrderedDict()
+        self._zobrist = None
+        self._nodes = 0
+        self._deadline = None
+        self._complete = True
+
+    def _reset(self, game: Game) -> None:
+        self._table.clear()
+        self._zobrist = Zobrist(game.row_count * game.col_count)
+        self._nodes = 0
+        self._complete = True
+        self._deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+
+    def _count_node(self) -> None:
+        self._nodes += 1
+        if self._nodes > self.max_nodes:
+            raise _BudgetExceeded()
+        if self._deadline is not None and self._nodes & 255 == 0 and time.perf_counter() > self._deadline:
+            raise _BudgetExceeded()
+
+    def _lookup(self, key):
+        value = self._table.get(key)
+        if value is not None:
+            self._table.move_to_end(key)
+        return value
+
+    def _store(self, key, value) -> None:
+        self._table[key] = value
+        self._table.move_to_end(key)
+        if len(self._table) > self.tt_size:
+            self._table.popitem(last=False)
+
+    @staticmethod
+    def reachable(game: Game) -> bool:
+        # рыцарь падает только вниз и не меняет столбец
+        knight, princess = game.knight, game.princess
+        return knight is not None and princess is not None and knight[1] == princess[1] and knight[0] < princess[0]
+
+    @staticmethod
+    def between(game: Game, chain) -> int:
+        knight, princess = game.knight, game.princess
+        return sum(1 for r, c in chain if c == knight[1] and knight[0] < r < princess[0])
+
+    @staticmethod
+    def column_runs(game: Game):
+        # вертикальные отрезки одинаковых фигур под рыцарем: генератор перечисляет только
+        # цепочки минимальной длины, а длинный отрезок опускает рыцаря сразу на много строк
+        knight, princess = game.knight, game.princess
+        contents, cols, c = game.board.contents_buffer, game.col_count, knight[1]
+        runs, r = list(), knight[0] + 1
+        while r < princess[0]:
+            end = r
+            while end + 1 < princess[0] and contents[(end + 1) * cols + c] == contents[r * cols + c]:
+                end += 1
+            if end - r + 1 >= game.min_chain_len:
+                runs.append([(i, c) for i in range(r, end + 1)])
+            r = end + 1
+        return runs
+
+    def _ordered_chains(self, game: Game, last: bool = False):
+        # все ходы позиции, сначала сильнее всего опускающие рыцаря; last - только ходы,
+        # убирающие все клетки между рыцарем и принцессой
+        knight, princess = game.knight, game.princess
+        generator = MoveGenerator(game)
+        gap = generator.mask((r, knight[1]) for r in range(knight[0] + 1, princess[0]))
+        chains, complete = generator.cell_sets(self.move_limit, gap if last else None)
+        if not complete:
+            self._complete = False
+        chains.sort(key=lambda chain: -self.between(game, chain))
+        return chains
+
+    def _candidate_chains(self, game: Game):
+        # эвристический набор для expectimax: цепочки минимальной длины и вертикальные отрезки
+        # под рыцарем, сначала сильнее всего опускающие рыцаря
+        knight, princess = game.knight, game.princess
+        generator = MoveGenerator(game)
+        segment = generator.mask((r, knight[1]) for r in range(knight[0] + 1, princess[0]))
+        chains, seen = list(), set()
+        for chain in self.column_runs(game) + generator.chains(self.branch_limit, touching=segment) + \
+                generator.chains(self.branch_limit):
+            cells = frozenset(chain)
+            if cells not in seen:
+                seen.add(cells)
+                chains.append(chain)
+        chains.sort(key=lambda chain: -self.between(game, chain))
+        return chains
+
+    def solve(self, game: Game) -> SolveResult:
+        # досыпка идёт из копий GameRandom самой игры, то есть решается ровно та партия,
+        # которую сыграет игрок с тем же зерном
+        self._reset(game)
+        start = time.perf_counter()
+        h = self._zobrist.hash(game)
+        status, path = SolveStatus.NOT_FOUND, None
+        try:
+            if game.state == GameState.WIN:
+                status, path = SolveStatus.SOLVED, []
+            else:
+                for depth in range(1, self.max_depth + 1):
+                    path = self._search(game, h, depth)
+                    if path is not None:
+                        status = SolveStatus.SOLVED
+                        break
+        except _BudgetExceeded:
+            status, path = SolveStatus.BUDGET, None
+        moves = len(path) if path is not None else None
+        exact = status != SolveStatus.BUDGET and self._complete
+        return SolveResult(status, moves, path, self._nodes, time.perf_counter() - start, exact)
+
+    def _search(self, game: Game, h: int, depth: int):
+        if not self.reachable(game):
+            return None
+        key = (h, game.random.position)
+        known = self._lookup(key)
+        if known is not None and known >= depth:
+            return None
+        self._count_node()
+        # последним ходом нужно убрать все клетки между рыцарем и принцессой
+        for chain in self._ordered_chains(game, depth == 1):
+            child = game.copy()
+            plan = child.apply_chain(chain)
+            if child.state == GameState.WIN:
+                return [chain]
+            if depth > 1:
+                path = self._search(child, self._zobrist.update(h, game, child, plan), depth - 1)
+                if path is not None:
+                    return [chain] + path
+        self._store(key, depth)  # из этой позиции за depth ходов не выиграть
+        return None
+
+    def expectimax(self, game: Game, depth: int = 2, samples: int = 4) -> SolveResult:
+        # ожидаемое число ходов до выигрыша с усреднением по samples случайным досыпкам на ход
+        self._reset(game)
+        start = time.perf_counter()
+        rng = rnd.Random(self.seed)
+        status, value = SolveStatus.SOLVED, None
+        try:
+            value = self._expect(game, self._zobrist.hash(game), depth, samples, rng)
+        except _BudgetExceeded:
+            status = SolveStatus.BUDGET
+        return SolveResult(status, value, None, self._nodes, time.perf_counter() - start)
+
+    def _estimate(self, game: Game) -> float:
+        # грубая оценка за горизонтом: клетки между рыцарем и принцессой убираются по цепочке
+        knight, princess = game.knight, game.princess
+        return max(1.0, (princess[0] - knight[0] - 1) / max(game.min_chain_len, 1))
+
+    def _expect(self, game: Game, h: int, depth: int, samples: int, rng: rnd.Random) -> float:
+        if game.state == GameState.WIN:
+            return 0.0
+        if not self.reachable(game):
+            return DEAD_END_COST
+        if depth == 0:
+            return self._estimate(game)
+        known = self._lookup(h)
+        if known is not None and known[0] >= depth:
+            return known[1]
+        self._count_node()
+        best = DEAD_END_COST
+        for chain in self._candidate_chains(game):
+            total = 0.0
+            for _ in range(samples):
+                child = game.copy()
+                plan = child.apply_chain(chain, lambda count: bytes(rng.choices(range(3), k=count)))
+                total += self._expect(child, self._zobrist.update(h, game, child, plan), depth - 1, samples, rng)
+            best = min(best, 1 + total / samples)
+        self._store(h, (depth, best))
+        return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Оценка сложности полей по кратчайшему выигрышу')
+    parser.add_argument('-n', '--games', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=Game.START_ROW_COUNT)
+    parser.add_argument('--cols', type=int, default=Game.START_COL_COUNT)
+    parser.add_argument('--min-chain-len', type=int, default=Game.START_MINIMUM_CHAIN_LENGTH)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_MAX_DEPTH)
+    parser.add_argument('--max-nodes', type=int, default=DEFAULT_MAX_NODES)
+    parser.add_argument('--time-limit', type=float, default=None)
+    parser.add_argument('--expectimax', type=int, default=0, metavar='DEPTH')
+    args = parser.parse_args()
+
+    solver = Solver(args.max_depth, args.max_nodes, args.time_limit, seed=args.seed)
+    for seed in range(args.seed, args.seed + args.games):
+        game = Game(args.rows, args.cols, args.min_chain_len, seed)
+        result = solver.expectimax(game, args.expectimax) if args.expectimax else solver.solve(game)
+        print('seed {}: {}'.format(seed, result))
+
+
+if __name__ == '__main__':
+    main()
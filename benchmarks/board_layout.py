@@ -0,0 +1,79 @@
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import Board, Cell, CellContents, Game  # noqa: E402
+
+SIZES = ((8, 5), (50, 50), (100, 100))
+REPEAT = 5
+
+
+def legacy_field(game: Game):
+    # прежняя раскладка: список списков объектов Cell
+    return [
+        [Cell(contents=game[r, c].contents) for c in range(game.col_count)]
+        for r in range(game.row_count)
+    ]
+
+
+def measure_memory(factory) -> int:
+    tracemalloc.start()
+    obj = factory()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def scan_legacy(field, row_count, col_count):
+    for r in range(row_count):
+        for c in range(col_count):
+            cell = field[r][c]
+            if cell.contents == CellContents.EMPTY or cell.is_active:
+                pass
+
+
+def scan_views(board: Board, row_count, col_count):
+    for r in range(row_count):
+        for c in range(col_count):
+            cell = board[r, c]
+            if cell.contents == CellContents.EMPTY or cell.is_active:
+                pass
+
+
+def scan_buffers(board: Board, row_count, col_count):
+    contents, active = board.contents_buffer, board.active_buffer
+    empty = CellContents.EMPTY.value
+    for i in range(row_count * col_count):
+        if contents[i] == empty or active[i]:
+            pass
+
+
+def main():
+    print('{:>9} {:>12} {:>12} {:>12} {:>12} {:>12}'.format(
+        'size', 'legacy, KiB', 'board, KiB', 'legacy, ms', 'views, ms', 'buffers, ms'))
+    for row_count, col_count in SIZES:
+        game = Game(row_count, col_count)
+        field = legacy_field(game)
+        board = game.board
+
+        legacy_mem = measure_memory(lambda: legacy_field(game))
+        board_mem = measure_memory(board.copy)
+
+        def best(stmt):
+            return min(timeit.repeat(stmt, number=1, repeat=REPEAT)) * 1000
+
+        legacy_time = best(lambda: scan_legacy(field, row_count, col_count))
+        views_time = best(lambda: scan_views(board, row_count, col_count))
+        buffers_time = best(lambda: scan_buffers(board, row_count, col_count))
+
+        print('{:>9} {:>12.1f} {:>12.1f} {:>12.3f} {:>12.3f} {:>12.3f}'.format(
+            '{}x{}'.format(row_count, col_count), legacy_mem / 1024, board_mem / 1024,
+            legacy_time, views_time, buffers_time))
+
+
+if __name__ == '__main__':
+    main()
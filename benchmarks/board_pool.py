@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BoardPool import BoardGenerator, BoardPool  # noqa: E402
+from Game import Game  # noqa: E402
+from Solver import Solver, SolveStatus  # noqa: E402
+
+CONFIGS = ((8, 5, 3, 20), (12, 8, 3, 10), (30, 30, 3, 3))  # строки, столбцы, мин. цепочка, полей
+GAMES = 20
+THINK_TIME = 0.5  # секунд между новыми играми у "игрока"
+
+
+def check_boards() -> None:
+    # зерно из генератора воспроизводит поле, и оно действительно выигрывается не дольше заявленного
+    generator = BoardGenerator(8, 5, 3, exact=True)
+    for _ in range(5):
+        spec = generator.generate()
+        result = Solver(max_depth=spec.moves).solve(Game(8, 5, 3, spec.seed))
+        assert result.status == SolveStatus.SOLVED, 'board is not solvable'
+        assert result.moves == spec.moves if spec.exact else result.moves <= spec.moves, 'wrong move count'
+    # Solver без бюджета или с неполным перебором ничего не доказывает,
+    # но выигрыш жадной игры оставляет поле в пуле
+    generator = BoardGenerator(8, 5, 3, exact=True, max_nodes=0)
+    assert not generator.generate(attempts=50).exact, 'unproven board marked as shortest'
+    generator = BoardGenerator(8, 5, 3, exact=True)
+    generator._solver.move_limit = 1
+    assert not generator.generate(attempts=50).exact, 'unproven board marked as shortest'
+    generator = BoardGenerator(8, 5, 3, difficulty=(4, 5), exact=True)
+    assert all(4 <= generator.generate().moves <= 5 for _ in range(3)), 'difficulty is ignored'
+
+
+def main():
+    check_boards()
+    print('boards: ok')
+
+    print('{:>10} {:>8} {:>8} {:>10} {:>10}'.format('config', 'boards', 'tried', 'accepted', 'boards/s'))
+    for row_count, col_count, min_chain_len, count in CONFIGS:
+        generator = BoardGenerator(row_count, col_count, min_chain_len, max(8, row_count))
+        for _ in range(count):
+            generator.generate()
+        print('{:>10} {:>8} {:>8} {:>10.0%} {:>10.1f}'.format(
+            '{}x{}/{}'.format(row_count, col_count, min_chain_len), count, generator.tried,
+            generator.acceptance, generator.boards_per_sec))
+
+    pool = BoardPool()
+    pool.prefill(Game.START_ROW_COUNT, Game.START_COL_COUNT, Game.START_MINIMUM_CHAIN_LENGTH)
+    pool.start()
+    game, waits = Game(), list()
+    time.sleep(2)  # окно успевает открыться, прежде чем игрок нажмёт "Новая игра"
+    for _ in range(GAMES):
+        start = time.perf_counter()
+        board = pool.take(game.row_count, game.col_count, game.min_chain_len)
+        game.new_game(board.seed if board is not None else None)
+        waits.append(time.perf_counter() - start)
+        time.sleep(THINK_TIME)
+    pool.stop()
+    print('{} new games every {} s, longest new game {:.2f} ms'.format(GAMES, THINK_TIME, max(waits) * 1000))
+    print(pool.stats())
+
+
+if __name__ == '__main__':
+    main()
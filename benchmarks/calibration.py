@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Calibration import CalibrationTable  # noqa: E402
+
+CONFIGS = ((8, 5, 3), (8, 5, 4), (12, 8, 3), (20, 10, 3))
+GAMES = 64
+LOOKUPS = 100000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'calibration.json')
+        table = CalibrationTable(path)
+        print('{:>10} {:>10} {:>10}  {}'.format('config', 'games', 'games/s', 'estimate'))
+        for config in CONFIGS:
+            start = time.perf_counter()
+            table.refine(config, GAMES // 2)
+            table.refine(config, GAMES // 2)  # вторая пачка продолжает зёрна первой
+            elapsed = time.perf_counter() - start
+            print('{:>10} {:>10} {:>10.1f}  {}'.format('{}x{}/{}'.format(*config), GAMES, GAMES / elapsed,
+                                                       table.get(config)))
+        table.save()
+
+        whole = CalibrationTable(path)
+        once = CalibrationTable(os.path.join(tmp, 'once.json'))
+        once.refine(CONFIGS[0], GAMES)
+        assert whole.get(CONFIGS[0]).as_dict() == once.get(CONFIGS[0]).as_dict(), 'refinement is not incremental'
+
+        lookup = timeit.timeit(lambda: whole.get(CONFIGS[0]), number=LOOKUPS) / LOOKUPS
+        start = time.perf_counter()
+        CalibrationTable(path)
+        load = time.perf_counter() - start
+    print('incremental refinement: ok')
+    print('cache lookup {:.2f} us, table load {:.2f} ms'.format(lookup * 1e6, load * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import CellContents, Game  # noqa: E402
+from MoveGenerator import MoveGenerator  # noqa: E402
+
+# Комбо-ход apply_chains: цепочки из каждой компоненты MoveGenerator.combo() очищаются вместе.
+# Осыпание за один проход сравнивается с пошаговым apply_drop_step, а каскады по очереди
+# сдвинутых клеток - с повторным поиском групп по всему полю после каждой досыпки
+SIZES = ((8, 5), (30, 30), (100, 100))
+GAMES = 20
+SEED = 2024
+UNMATCHED = (CellContents.EMPTY.value, CellContents.KNIGHT.value, CellContents.PRINCESS.value)
+
+
+def stepped(game: Game, combo) -> float:
+    # прежний путь: осыпание по одной клетке на шаг в каждом столбце, как в step_down_generator
+    cells = [rc for chain in combo for rc in chain]
+    start = time.perf_counter()
+    game._active_cells = cells
+    plan = game._drop_plan()
+    game._clear_active_cell()
+    game._active_cells = list()
+    for step in range(plan.steps):
+        game.board.apply_drop_step(plan, step)
+        game._track_drop(plan, step)
+    return time.perf_counter() - start
+
+
+def groups(game: Game):
+    # все связные группы одинаковых фигур поля полным обходом
+    contents, cols, size = game.board.contents_buffer, game.col_count, game.row_count * game.col_count
+    seen = set()
+    for i in range(size):
+        if i in seen or contents[i] in UNMATCHED:
+            continue
+        group, stack = [i], [i]
+        seen.add(i)
+        while stack:
+            j = stack.pop()
+            r, c = divmod(j, cols)
+            for rr, cc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                k = rr * cols + cc
+                if game.is_inside((rr, cc)) and k not in seen and contents[k] == contents[i]:
+                    seen.add(k)
+                    group.append(k)
+                    stack.append(k)
+        yield group
+
+
+def rescan(game: Game, combo) -> float:
+    # каскады с поиском групп по всему полю после каждой досыпки; убираются группы,
+    # в которых есть сдвинутая осыпанием клетка
+    start = time.perf_counter()
+    plan, cols = game.apply_chains(combo)[0], game.col_count
+    for _ in range(game.MAX_CASCADES):
+        if game._is_knight_above_princess():
+            break
+        moved = {r * cols + drop.col for drop in plan for r in range(drop.depth)}
+        cells = [divmod(j, cols) for group in groups(game)
+                 if len(group) >= game.min_chain_len and moved.intersection(group) for j in group]
+        if not cells:
+            break
+        plan = game._clear_and_drop(cells)
+    return time.perf_counter() - start
+
+
+def main():
+    print('{:>9} {:>7} {:>12} {:>12} {:>9} {:>12} {:>12}'.format(
+        'size', 'chains', 'stepped, ms', 'one pass, ms', 'cascades', 'rescan, ms', 'queue, ms'))
+    for row_count, col_count in SIZES:
+        totals, chains, cascades = [0.0] * 4, 0, 0
+        for i in range(GAMES):
+            game = Game(row_count, col_count, seed=SEED + i)
+            combo = MoveGenerator(game).combo()
+            if not combo:
+                continue
+            chains += len(combo)
+            start_board = bytes(game.board.contents_buffer)
+
+            reference = game.copy(shared_cache=False)
+            totals[0] += stepped(reference, combo)
+            one_pass = game.copy(shared_cache=False)
+            start = time.perf_counter()
+            one_pass._clear_and_drop([rc for chain in combo for rc in chain])
+            totals[1] += time.perf_counter() - start
+            assert one_pass.board.contents_buffer == reference.board.contents_buffer, 'one pass differs from steps'
+            assert (one_pass.knight, one_pass.princess) == (reference.knight, reference.princess)
+
+            reference = game.copy(shared_cache=False)
+            totals[2] += rescan(reference, combo)
+            start = time.perf_counter()
+            plans = game.apply_chains(combo, cascade=True)
+            totals[3] += time.perf_counter() - start
+            cascades += len(plans) - 1
+            assert game.board.contents_buffer == reference.board.contents_buffer, 'work queue differs from rescan'
+            game.verify_positions()
+            game.undo()
+            assert game.board.contents_buffer == start_board, 'undo did not restore the board'
+        print('{:>9} {:>7} {:>12.3f} {:>12.3f} {:>9} {:>12.3f} {:>12.3f}'.format(
+            '{}x{}'.format(row_count, col_count), chains, *(t / GAMES * 1000 for t in totals[:2]),
+            cascades, *(t / GAMES * 1000 for t in totals[2:])))
+
+
+if __name__ == '__main__':
+    main()
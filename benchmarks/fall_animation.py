@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QEventLoop, QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from Game import CellContents  # noqa: E402
+from MainWindow import MainWindow  # noqa: E402
+
+# Осыпание цепочки из 30 клеток, уложенной "змейкой" по строкам 1..3 поля 12x10
+ROW_COUNT, COL_COUNT = 12, 10
+CHAIN_LEN = 30
+SLEEP_TIME = 0.1
+SEED = 5
+
+
+def select_chain(mw: MainWindow) -> None:
+    game = mw.game
+    game.new_game(SEED)
+    path = list()
+    for r in range(1, ROW_COUNT - 1):
+        row = [(r, c) for c in range(COL_COUNT)]
+        path.extend(row if r % 2 else row[::-1])
+    path = path[:CHAIN_LEN]
+    for rc in path:
+        game[rc].contents = CellContents.SQUARE
+    game.on_mouse_press(path[0])
+    for rc in path[1:]:
+        assert game.on_mouse_move(rc)
+    mw._update_view()
+
+
+def legacy_collapse(app: QApplication, mw: MainWindow):
+    # прежняя анимация: поле целиком меняется на каждом шаге step_down_generator раз в sleep_time
+    steps = mw.game.step_down_generator()
+    timer, frames = QTimer(), [0]
+
+    def tick():
+        if next(steps, None) is None:
+            timer.stop()
+        else:
+            frames[0] += 1
+            mw._update_view()
+
+    timer.timeout.connect(tick)
+    timer.start(int(SLEEP_TIME * 1000))
+    tick()
+    while timer.isActive():
+        app.processEvents(QEventLoop.WaitForMoreEvents)
+    return frames[0]
+
+
+def interpolated_collapse(app: QApplication, mw: MainWindow):
+    mw._start_collapse()
+    while mw.is_collapsing:
+        app.processEvents(QEventLoop.WaitForMoreEvents)
+    return mw.instruments.histogram('fall_frame').count
+
+
+# цикл событий ждёт таймера, а не крутится вхолостую, так что process_time - это работа анимации
+def run(app: QApplication, mw: MainWindow, collapse) -> dict:
+    select_chain(mw)
+    app.processEvents()
+    paint = mw.instruments.histogram('on_item_paint')
+    paints = paint.count
+    cpu, start = time.process_time(), time.perf_counter()
+    frames = collapse(app, mw)
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    app.processEvents()
+    return {'frames': frames, 'wall': wall, 'fps': frames / wall, 'cpu': cpu / wall,
+            'paints': (paint.count - paints) / max(frames, 1), 'board': bytes(mw.game.board.contents_buffer)}
+
+
+def main():
+    app = QApplication(sys.argv)
+    mw = MainWindow()
+    mw.board_pool.stop()  # фоновая генерация полей мешает замерам
+    mw.game.row_count, mw.game.col_count = ROW_COUNT, COL_COUNT
+    mw._resize_table()
+    mw._new_game()
+    mw._hints.cancel()
+    mw.sleep_time = SLEEP_TIME
+    mw.resize(800, 900)
+    mw.show()
+    app.processEvents()
+
+    legacy = run(app, mw, legacy_collapse)
+    interpolated = run(app, mw, interpolated_collapse)
+    assert legacy['board'] == interpolated['board'], 'animations end on different boards'
+    print('{}-cell collapse on a {}x{} board, {} s per row'.format(CHAIN_LEN, ROW_COUNT, COL_COUNT, SLEEP_TIME))
+    print('{:<14} {:>7} {:>9} {:>7} {:>7} {:>15}'.format('', 'frames', 'time, ms', 'fps', 'cpu', 'paints/frame'))
+    for name, result in (('stepped', legacy), ('interpolated', interpolated)):
+        print('{:<14} {:>7} {:>9.0f} {:>7.1f} {:>6.0%} {:>15.1f}'.format(
+            name, result['frames'], result['wall'] * 1000, result['fps'], result['cpu'], result['paints']))
+    frame = mw.instruments.histogram('fall_frame')
+    print('frame update: mean {:.1f} us, max {:.0f} us'.format(frame.mean * 1e6, frame.max * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QRectF  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from MainWindow import IMAGE_NAMES, MainWindow  # noqa: E402
+
+ROW_COUNT = COL_COUNT = 100
+CELL_SIZE = 50
+FRAMES = 20
+
+
+def legacy_paint(mw: MainWindow):
+    # прежний on_item_paint: растеризация SVG для каждой клетки на каждом кадре
+    def paint(e, painter, option):
+        item = mw.game[e.row(), e.column()]
+        mw._images.renderer(IMAGE_NAMES[item.contents, item.is_active]).render(painter, QRectF(option.rect))
+    return paint
+
+
+def frame_time(app: QApplication, mw: MainWindow) -> float:
+    viewport = mw.tableView.viewport()
+    viewport.repaint()  # прогрев
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        viewport.repaint()
+    app.processEvents()
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def main():
+    app = QApplication(sys.argv)
+    mw = MainWindow()
+    mw.LARGE_BOARD_CELLS = ROW_COUNT * COL_COUNT + 1  # замеряется отрисовка через делегат
+    mw.cell_size = CELL_SIZE
+    mw.game.row_count, mw.game.col_count = ROW_COUNT, COL_COUNT
+    mw._resize_table()
+    mw._new_game()
+    mw.resize(1024, 768)
+    mw.show()
+    app.processEvents()
+
+    mw.on_item_paint = legacy_paint(mw)
+    before = frame_time(app, mw)
+    del mw.on_item_paint
+    after = frame_time(app, mw)
+    print('{}x{} board, {} px cells, full viewport frame'.format(ROW_COUNT, COL_COUNT, CELL_SIZE))
+    print('  SVG render per cell: {:8.2f} ms'.format(before))
+    print('  cached pixmaps:      {:8.2f} ms ({} pixmaps cached)'.format(after, len(mw._images)))
+
+
+if __name__ == '__main__':
+    main()
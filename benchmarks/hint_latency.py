@@ -0,0 +1,57 @@
+import os
+import statistics
+import sys
+from collections import Counter
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer  # noqa: E402
+
+from Game import Game  # noqa: E402
+from HintEngine import DEFAULT_BUDGET, HintEngine, find_hint  # noqa: E402
+
+CONFIGS = ((30, 30, 3), (100, 100, 3), (100, 100, 5), (100, 100, 7))
+SEEDS = range(20)
+
+
+def check_engine(app: QCoreApplication) -> float:
+    # три запроса подряд: первые два отменяются, приходит только последний
+    engine, received = HintEngine(), list()
+    loop = QEventLoop()
+
+    def on_ready(hint):
+        received.append(hint)
+        QTimer.singleShot(200, loop.quit)  # подождать, не придут ли отменённые
+
+    engine.hint_ready.connect(on_ready)
+    games = [Game(100, 100, 5, seed) for seed in range(3)]
+    for game in games:
+        last = engine.request(game)
+    loop.exec_()
+    assert [hint.generation for hint in received] == [last], 'cancelled hints delivered'
+    expected = find_hint(games[-1], 10.0)
+    assert received[0].chain == expected.chain, 'engine hint differs from find_hint'
+    return received[0].elapsed
+
+
+def main():
+    app = QCoreApplication(sys.argv)
+    elapsed = check_engine(app)
+    print('engine: cancellation ok, latest hint in {:.1f} ms'.format(elapsed * 1000))
+
+    print('budget {:.0f} ms'.format(DEFAULT_BUDGET * 1000))
+    print('{:>12} {:>10} {:>10} {:>10}  budgets met'.format('config', 'median, ms', 'max, ms', 'no move'))
+    for row_count, col_count, min_chain_len in CONFIGS:
+        hints = [find_hint(Game(row_count, col_count, min_chain_len, seed)) for seed in SEEDS]
+        times = [hint.elapsed * 1000 for hint in hints]
+        met = Counter(hint.budget for hint in hints)
+        print('{:>12} {:>10.1f} {:>10.1f} {:>10}  {}'.format(
+            '{}x{}/{}'.format(row_count, col_count, min_chain_len), statistics.median(times), max(times),
+            sum(1 for hint in hints if hint.chain is None),
+            ', '.join('{}: {}'.format('over' if budget is None else '{:.0f} ms'.format(budget * 1000), count)
+                      for budget, count in sorted(met.items(), key=lambda item: item[0] or 1e9))))
+
+
+if __name__ == '__main__':
+    main()
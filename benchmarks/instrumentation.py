@@ -0,0 +1,100 @@
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QEvent, QPoint, Qt  # noqa: E402
+from PyQt5.QtGui import QMouseEvent  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from Instruments import Instruments  # noqa: E402
+from MainWindow import MainWindow  # noqa: E402
+
+MOVES = 2000
+REPEAT = 5
+NUMBER = 200000
+
+
+def mouse(kind, mw: MainWindow, r: int, c: int) -> QMouseEvent:
+    rect = mw.tableView.visualRect(mw._model.index(r, c))
+    return QMouseEvent(kind, QPoint(rect.center()), Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+
+
+def move_handler_time(mw: MainWindow, legacy_out=None) -> float:
+    # движение мыши туда-обратно по двум клеткам первой строки
+    handler = mw.tableView.mouseMoveEvent
+    if legacy_out is not None:
+        def handler(e, handler=handler):
+            # прежний обработчик: print() на каждое движение
+            idx = mw.tableView.indexAt(e.pos())
+            print('move row = {}, column = {}'.format(idx.row(), idx.column()), file=legacy_out)
+            mw.game.on_mouse_move((idx.row(), idx.column()))
+    events = [mouse(QEvent.MouseMove, mw, 0, c % 2) for c in range(MOVES)]
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for e in events:
+            handler(e)
+        best = min(best, time.perf_counter() - start)
+    return best / MOVES * 1e6
+
+
+def main():
+    app = QApplication(sys.argv)
+    mw = MainWindow()
+    mw.show()
+    app.processEvents()
+    mw.board_pool.stop()  # фоновая генерация полей мешает замерам
+    stats = mw.instruments
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'console.log'), 'w') as out:
+            legacy = move_handler_time(mw, out)
+        quiet = move_handler_time(mw)
+        stats.trace_every = 100
+        sampled = move_handler_time(mw)
+        stats.trace_every = 1
+        traced = move_handler_time(mw)
+        stats.trace_every = 0
+
+        print('mouse move handler, us per event')
+        print('  print() to a file:   {:8.2f}'.format(legacy))
+        print('  tracing off:         {:8.2f}'.format(quiet))
+        print('  tracing 1/100:       {:8.2f}'.format(sampled))
+        print('  tracing every event: {:8.2f}'.format(traced))
+
+        bare = Instruments()
+        print('instrument calls, ns per call')
+        print('  tracing check (off): {:8.1f}'.format(
+            timeit.timeit('s.tracing and s.trace("m", 1, 2)', globals={'s': bare}, number=NUMBER) / NUMBER * 1e9))
+        print('  histogram add():     {:8.1f}'.format(
+            timeit.timeit('h.add(1e-5)', globals={'h': bare.histogram('m')}, number=NUMBER) / NUMBER * 1e9))
+
+        # один ход мышью с профилированием, затем статистика в файл
+        mw.profile_action.setChecked(True)
+        mw.tableView.mousePressEvent(mouse(QEvent.MouseButtonPress, mw, 1, 0))
+        mw.tableView.mouseReleaseEvent(mouse(QEvent.MouseButtonRelease, mw, 1, 0))
+        while mw.is_collapsing:
+            app.processEvents()
+        mw.profile_action.setChecked(False)
+        path = os.path.join(tmp, 'stats.json')
+        mw.stats_file = path
+        with contextlib.suppress(Exception):
+            mw.close()
+        with open(path, encoding='UTF-8') as f:
+            dumped = json.load(f)
+        for name in ('on_mouse_move', '_update_view', 'on_item_paint'):
+            assert dumped['histograms'][name]['count'] > 0, name
+        assert dumped['counters']['mouse_press'] == 1 and dumped['profile'], 'stats not dumped'
+    print('dump: ok')
+    print(stats)
+
+
+if __name__ == '__main__':
+    main()
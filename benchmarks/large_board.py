@@ -0,0 +1,109 @@
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QEvent, QPointF, Qt  # noqa: E402
+from PyQt5.QtGui import QMouseEvent  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from Game import CellContents  # noqa: E402
+from MainWindow import MainWindow  # noqa: E402
+
+# Поле 500x500: полная перерисовка видимой части делегатом и одним проходом paintEvent,
+# затем выделение мышью цепочки из DRAG_CELLS клеток с перерисовкой после каждого движения
+ROW_COUNT = COL_COUNT = 500
+CELL_SIZES = (4, 12, 20)
+DRAG_CELLS = 300
+SEED = 3
+FRAME_BUDGET = 1 / 60
+
+
+def mouse(mw: MainWindow, kind, rc) -> QMouseEvent:
+    rect = mw.tableView.visualRect(mw.tableView.model().index(*rc))
+    return QMouseEvent(kind, QPointF(rect.center()), Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+
+
+def snake(mw: MainWindow, length: int):
+    # путь по видимым строкам, начиная со второй
+    view = mw.tableView.viewport()
+    cols = min(view.width() // mw.cell_size, COL_COUNT) - 1
+    path = list()
+    for r in range(1, ROW_COUNT):
+        row = [(r, c) for c in range(cols)]
+        path.extend(row if r % 2 else row[::-1])
+        if len(path) >= length:
+            return path[:length]
+
+
+def full_repaint(app: QApplication, mw: MainWindow) -> float:
+    viewport = mw.tableView.viewport()
+    times = list()
+    for _ in range(5):
+        start = time.perf_counter()
+        viewport.repaint()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def drag(app: QApplication, mw: MainWindow):
+    path = snake(mw, DRAG_CELLS)
+    for rc in path:
+        mw.game[rc].contents = CellContents.SQUARE
+    mw._model.cells_changed(None)
+    app.processEvents()
+    table, times = mw.tableView, list()
+    paints = mw.instruments.histogram('_paint_board')
+    painted = paints.count
+    table.mousePressEvent(mouse(mw, QEvent.MouseButtonPress, path[0]))
+    app.processEvents()
+    for rc in path[1:]:
+        e = mouse(mw, QEvent.MouseMove, rc)
+        start = time.perf_counter()
+        table.mouseMoveEvent(e)
+        app.processEvents()  # перерисовка изменившихся клеток
+        times.append(time.perf_counter() - start)
+    assert len(mw.game.active_cells) == len(path), 'drag lost cells'
+    assert paints.count - painted >= len(path) - 1, 'moves were not repainted'
+    mw.game.update_past_mouse_release()
+    mw.game.new_game(SEED)
+    mw._update_view()
+    times.sort()
+    return statistics.mean(times) * 1000, times[int(len(times) * 0.99)] * 1000
+
+
+def main():
+    app = QApplication(sys.argv)
+    mw = MainWindow()
+    mw.board_pool.stop()  # фоновая генерация полей мешает замерам
+    mw.resize(1024, 768)
+    mw.show()
+    print('{}x{} board, {}x{} viewport'.format(ROW_COUNT, COL_COUNT, mw.tableView.viewport().width(),
+                                                 mw.tableView.viewport().height()))
+    print('{:>6} {:>6} {:>14} {:>14} {:>12} {:>12} {:>9}'.format(
+        'cell', 'lod', 'delegate, ms', 'one pass, ms', 'move, ms', 'p99, ms', 'p99 fps'))
+    for size in CELL_SIZES:
+        mw.cell_size = size
+        mw.game.row_count, mw.game.col_count = ROW_COUNT, COL_COUNT
+        mw._resize_table()
+        mw._new_game()
+        mw.game.new_game(SEED)
+        mw._update_view()
+        app.processEvents()
+        assert mw.is_large_board
+        mw._paint_whole = False  # прежний путь: делегат на каждую видимую клетку
+        delegate = full_repaint(app, mw)
+        mw._paint_whole = True
+        one_pass = full_repaint(app, mw)
+        mean, p99 = drag(app, mw)
+        print('{:>6} {:>6} {:>14.1f} {:>14.1f} {:>12.2f} {:>12.2f} {:>9.0f}'.format(
+            size, 'yes' if mw._lod else 'no', delegate, one_pass, mean, p99, 1000 / p99))
+        if p99 > FRAME_BUDGET * 1000:
+            print('  drag p99 is over the 60 fps frame budget')
+
+
+if __name__ == '__main__':
+    main()
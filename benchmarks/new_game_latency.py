@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtGui import QStandardItemModel  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from MainWindow import MainWindow  # noqa: E402
+
+SIZES = ((30, 30), (100, 100))
+REPEAT = 50
+
+
+def timed(app: QApplication, action, setup) -> float:
+    # setup (новая партия) в замер не входит
+    total = 0.0
+    for _ in range(REPEAT):
+        setup()
+        app.processEvents()
+        start = time.perf_counter()
+        action()
+        app.processEvents()
+        total += time.perf_counter() - start
+    return total / REPEAT * 1000
+
+
+def main():
+    app = QApplication(sys.argv)
+    mw = MainWindow()
+    mw.board_pool.stop()  # фоновые проверка полей и подсказки отнимают GIL у замеров
+    mw._hints.cancel()
+    mw.show()
+    app.processEvents()
+    game, table = mw.game, mw.tableView
+
+    # замеряется только обновление модели и перерисовка; новая партия готовится заранее, для столбцов
+    # resize - с другим числом строк
+    def new_game(resize: bool):
+        def setup():
+            if resize:
+                game.row_count += 1 if game.row_count % 2 == 0 else -1
+            game.new_game()
+        return setup
+
+    def legacy():
+        # прежний _game_resize: новая QStandardItemModel на каждую игру
+        table.setModel(QStandardItemModel(game.row_count, game.col_count))
+        table.viewport().update()
+
+    def refresh():
+        mw._model.refresh()
+        table.viewport().update()
+
+    print('{:>9} {:>18} {:>14} {:>20} {:>16}'.format(
+        'size', 'item model, ms', 'refresh, ms', 'item model resize', 'refresh resize'))
+    for row_count, col_count in SIZES:
+        game.row_count, game.col_count = row_count, col_count
+        times = list()
+        for resize in (False, True):
+            game.row_count = row_count
+            times.append(timed(app, legacy, new_game(resize)))
+            game.row_count = row_count
+            game.new_game()
+            table.setModel(mw._model)
+            mw._model.refresh()
+            times.append(timed(app, refresh, new_game(resize)))
+        print('{:>9} {:>18.2f} {:>14.2f} {:>20.2f} {:>16.2f}'.format(
+            '{}x{}'.format(row_count, col_count), times[0], times[1], times[2], times[3]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from Game import CellContents  # noqa: E402
+from MainWindow import MainWindow  # noqa: E402
+
+ROW_COUNT = COL_COUNT = 100
+CELL_SIZE = 10
+DRAG_ROW = 5  # строка должна попадать в видимую часть поля
+
+
+def legacy_update_view(mw: MainWindow):
+    # прежний _update_view: весь viewport плюс синхронный repaint()
+    mw.game.take_dirty_cells()
+    mw.tableView.viewport().update()
+    mw.tableView.update()
+    mw.repaint()
+
+
+def drag(app: QApplication, mw: MainWindow, update_view) -> int:
+    game = mw.game
+    game.new_game(seed=1)
+    for c in range(COL_COUNT):
+        game[DRAG_ROW, c].contents = CellContents.SQUARE
+    update_view()
+    app.processEvents()
+
+    painted = [0]
+    paint = mw.on_item_paint
+
+    def counting_paint(*args):
+        painted[0] += 1
+        paint(*args)
+
+    mw.on_item_paint = counting_paint
+    game.on_mouse_press((DRAG_ROW, 0))
+    update_view()
+    app.processEvents()
+    for c in range(1, COL_COUNT):
+        if game.on_mouse_move((DRAG_ROW, c)):
+            update_view()
+        app.processEvents()
+    del mw.on_item_paint
+    return painted[0]
+
+
+def main():
+    app = QApplication(sys.argv)
+    mw = MainWindow()
+    # замеряется отрисовка через делегат
+    mw.LARGE_BOARD_CELLS, mw.LOD_CELL_SIZE = ROW_COUNT * COL_COUNT + 1, CELL_SIZE
+    mw.cell_size = CELL_SIZE
+    mw.game.row_count, mw.game.col_count = ROW_COUNT, COL_COUNT
+    mw._resize_table()
+    mw._new_game()
+    mw.resize(CELL_SIZE * COL_COUNT + 100, CELL_SIZE * ROW_COUNT + 150)
+    mw.show()
+    app.processEvents()
+
+    moves = COL_COUNT - 1
+    legacy = drag(app, mw, lambda: legacy_update_view(mw))
+    dirty = drag(app, mw, mw._update_view)
+    print('drag across {} cells of a {}x{} board'.format(COL_COUNT, ROW_COUNT, COL_COUNT))
+    print('  full repaint: {:>8} cell paints, {:>8.1f} per move'.format(legacy, legacy / moves))
+    print('  dirty cells:  {:>8} cell paints, {:>8.1f} per move'.format(dirty, dirty / moves))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import io
+import json
+import os
+import random as rnd
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import Game  # noqa: E402
+from Replay import Replay, ReplayHeader, ReplayReader, ReplayWriter  # noqa: E402
+from Simulation import GreedyKnightPolicy, play  # noqa: E402
+
+SIZES = ((8, 5, 3, 2000), (30, 30, 3, 40))  # строки, столбцы, мин. цепочка, партий
+
+
+def to_json(replay: Replay) -> str:
+    header = replay.header
+    return json.dumps({'row_count': header.row_count, 'col_count': header.col_count,
+                       'min_chain_len': header.min_chain_len, 'seed': header.seed,
+                       'random_position': header.random_position, 'board': list(header.contents),
+                       'moves': replay.moves}, separators=(',', ':'))
+
+
+def from_json(line: str) -> Replay:
+    data = json.loads(line)
+    header = ReplayHeader(data['row_count'], data['col_count'], data['min_chain_len'], data['seed'],
+                          data['random_position'], bytes(data['board']))
+    return Replay(header, [[tuple(rc) for rc in chain] for chain in data['moves']])
+
+
+def played_games(row_count: int, col_count: int, min_chain_len: int, count: int):
+    games = list()
+    for seed in range(count):
+        game = Game(row_count, col_count, min_chain_len, seed)
+        play(game, GreedyKnightPolicy(), rnd.Random(seed))
+        games.append(game)
+    return games
+
+
+def check_round_trip(games) -> None:
+    stream = io.BytesIO()
+    writer = ReplayWriter(stream)
+    for game in games:
+        writer.write(game)
+    stream.seek(0)
+    replays = list(ReplayReader(stream))
+    assert len(replays) == len(games), 'games lost'
+    for game, replay in zip(games, replays):
+        replayed = replay.game()
+        assert replayed.board.contents_buffer == game.board.contents_buffer, 'replay diverges'
+        assert replayed.state == game.state and replayed.turn == game.turn
+        if len(replay) > 1:
+            middle = replay.game(len(replay) // 2)
+            game = game.copy()
+            game.goto(len(replay) // 2)
+            assert middle.board.contents_buffer == game.board.contents_buffer, 'seek diverges'
+    stream.seek(0)
+    reader = ReplayReader(stream)
+    assert reader.skip(len(games) - 1) == len(games) - 1
+    assert reader.read().header.seed == games[-1].seed, 'skip lands on a wrong game'
+
+
+def main():
+    for row_count, col_count, min_chain_len, count in SIZES:
+        games = played_games(row_count, col_count, min_chain_len, count)
+        check_round_trip(games)
+        replays = [Replay.of(game) for game in games]
+        moves = sum(len(replay) for replay in replays)
+
+        start = time.perf_counter()
+        stream = io.BytesIO()
+        writer = ReplayWriter(stream)
+        for replay in replays:
+            writer.write_encoded(replay.encode())
+        binary_encode = time.perf_counter() - start
+        start = time.perf_counter()
+        stream.seek(0)
+        decoded = sum(1 for _ in ReplayReader(stream))
+        binary_decode = time.perf_counter() - start
+        binary_size = len(stream.getvalue())
+
+        start = time.perf_counter()
+        text = '\n'.join(to_json(replay) for replay in replays)
+        json_encode = time.perf_counter() - start
+        start = time.perf_counter()
+        decoded_json = sum(1 for line in text.split('\n') if from_json(line))
+        json_decode = time.perf_counter() - start
+        json_size = len(text.encode())
+        assert decoded == decoded_json == count
+
+        print('{}x{} board, {} games, {} moves'.format(row_count, col_count, count, moves))
+        print('  {:>7} {:>14} {:>14} {:>12} {:>14}'.format('format', 'encode, gm/s', 'decode, gm/s',
+                                                           'size, bytes', 'bytes per game'))
+        for name, encode, decode, size in (('binary', binary_encode, binary_decode, binary_size),
+                                           ('json', json_encode, json_decode, json_size)):
+            print('  {:>7} {:>14.0f} {:>14.0f} {:>12} {:>14.1f}'.format(
+                name, count / encode, count / decode, size, size / count))
+    print('round trip: ok')
+
+
+if __name__ == '__main__':
+    main()
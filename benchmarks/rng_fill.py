@@ -0,0 +1,54 @@
+import os
+import random as rnd
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import Game, GameRandom, numpy  # noqa: E402
+
+ROW_COUNT = COL_COUNT = 100
+NUMBER = 20
+REPEAT = 5
+
+
+def legacy_fill(count) -> bytes:
+    # прежний Game.my_random: по одному randint на клетку
+    return bytes(rnd.randint(0, 2) for _ in range(count))
+
+
+def check_determinism() -> None:
+    for use_numpy in (False, True) if numpy is not None else (False,):
+        GameRandom.USE_NUMPY = use_numpy
+        first, second = Game(ROW_COUNT, COL_COUNT, seed=42), Game(ROW_COUNT, COL_COUNT, seed=42)
+        assert first.board.contents_buffer == second.board.contents_buffer, 'boards differ'
+        assert first.random.contents(1000) == second.random.contents(1000), 'refills differ'
+        other = Game(ROW_COUNT, COL_COUNT, seed=43)
+        assert other.board.contents_buffer != first.board.contents_buffer, 'seed is ignored'
+        copy = first.copy()
+        assert copy.random.contents(500) == first.random.contents(500), 'copy diverges'
+    GameRandom.USE_NUMPY = False
+
+
+def main():
+    check_determinism()
+    print('determinism: ok')
+
+    count = ROW_COUNT * COL_COUNT
+    game = Game(ROW_COUNT, COL_COUNT)
+
+    def best(stmt):
+        return min(timeit.repeat(stmt, number=NUMBER, repeat=REPEAT)) / NUMBER * 1000
+
+    print('{}x{} fill, ms per board'.format(ROW_COUNT, COL_COUNT))
+    print('  legacy randint: {:8.3f}'.format(best(lambda: legacy_fill(count))))
+    variants = (('getrandbits', False), ('numpy', True)) if numpy is not None else (('getrandbits', False),)
+    for name, use_numpy in variants:
+        GameRandom.USE_NUMPY = use_numpy
+        print('  {:>14}: {:8.3f}'.format(name, best(lambda: GameRandom().contents(count))))
+        print('  {:>14}: {:8.3f}  (whole new_game)'.format(name, best(game.new_game)))
+    GameRandom.USE_NUMPY = False
+
+
+if __name__ == '__main__':
+    main()
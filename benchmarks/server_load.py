@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Game import Game  # noqa: E402
+from GameServer import GameClient, ServerError  # noqa: E402
+from Instruments import Histogram  # noqa: E402
+
+# Нагрузка на GameServer из отдельного процесса: SESSIONS партий по CONNECTIONS соединениям,
+# затем ROUNDS ходов в каждой партии (moves, затем apply_chain первой цепочки)
+SESSIONS = 10000
+CONNECTIONS = 32
+ROUNDS = 5
+SEED = 777
+
+
+async def start_server(max_sessions: int):
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(ROOT, 'GameServer.py'), '--port', '0', '--max-sessions', str(max_sessions),
+        stdout=subprocess.PIPE)
+    line = (await process.stdout.readline()).decode()
+    host, port = line.split()[-1].rsplit(':', 1)
+    return process, host, int(port)
+
+
+async def check_determinism(client: GameClient) -> None:
+    # партия на сервере с общим кэшем блоков совпадает с локальной партией с тем же зерном
+    session = (await client.call('new_game', rows=12, cols=8, seed=SEED))['session']
+    local = Game(12, 8, 3, SEED)
+    for _ in range(10):
+        chains = (await client.call('moves', session=session, limit=1))['chains']
+        if not chains:
+            break
+        await client.call('apply_chain', session=session, chain=chains[0])
+        local.apply_chain(chains[0])
+    state = await client.call('state', session=session)
+    assert state['board'] == ''.join(str(v) for v in local.board.contents_buffer), 'server board differs'
+    assert state['turn'] == local.turn
+    undone = await client.call('undo', session=session)
+    assert undone['undone'] and undone['turn'] == local.turn - 1
+    try:
+        await client.call('apply_chain', session=session, chain=[[0, 0]])
+    except ServerError:
+        pass
+    else:
+        raise AssertionError('invalid chain accepted')
+    await client.call('close', session=session)
+
+
+async def run(sessions: int, connections: int, rounds: int) -> None:
+    process, host, port = await start_server(sessions + 1)
+    try:
+        clients = [await GameClient.connect(host, port) for _ in range(connections)]
+        await check_determinism(clients[0])
+        base = (await clients[0].call('stats'))['rss_kb']
+
+        start = time.perf_counter()
+        ids = list()
+
+        async def create(client, count, offset):
+            for k in range(count):
+                ids.append((client, (await client.call('new_game', seed=SEED + offset + k))['session']))
+
+        per = sessions // connections
+        await asyncio.gather(*(create(client, per + (k < sessions % connections), k * (per + 1))
+                               for k, client in enumerate(clients)))
+        created = time.perf_counter() - start
+        stats = await clients[0].call('stats')
+        fresh = stats['rss_kb']
+
+        latency, moves = Histogram(), 0
+
+        async def play(part):
+            nonlocal moves
+            for _ in range(rounds):
+                for client, session in part:
+                    chains = (await client.call('moves', session=session, limit=1))['chains']
+                    if not chains:
+                        continue
+                    t = time.perf_counter()
+                    await client.call('apply_chain', session=session, chain=chains[0])
+                    latency.add(time.perf_counter() - t)
+                    moves += 1
+
+        by_client = dict()
+        for client, session in ids:
+            by_client.setdefault(client, list()).append((client, session))
+        start = time.perf_counter()
+        await asyncio.gather(*(play(part) for part in by_client.values()))
+        played = time.perf_counter() - start
+        stats = await clients[0].call('stats')
+        for client in clients:
+            await client.close()
+    finally:
+        process.terminate()
+        await process.wait()
+
+    assert stats['sessions'] == sessions, stats['sessions']
+    server = stats['ops']['apply_chain']
+    print('determinism: ok')
+    print('sessions per process: {} ({} connections), created {:.0f}/s'.format(
+        stats['sessions'], connections, sessions / created))
+    print('memory per session: {:.2f} KB new, {:.2f} KB after {} moves each (rss {} -> {} -> {} KB)'.format(
+        (fresh - base) / sessions, (stats['rss_kb'] - base) / sessions, rounds, base, fresh, stats['rss_kb']))
+    print('apply_chain: {} moves, {:.0f} moves/s'.format(moves, moves / played))
+    print('  round trip p50 {:.0f} us, p99 {:.0f} us'.format(latency.percentile(50) * 1e6,
+                                                           latency.percentile(99) * 1e6))
+    print('  server     p50 {:.0f} us, p99 {:.0f} us, mean {:.1f} us'.format(
+        server['p50_us'], server['p99_us'], server['mean_us']))
+    print('shared refill blocks cached: {}'.format(stats['cached_blocks']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузка на сервер партий')
+    parser.add_argument('-n', '--sessions', type=int, default=SESSIONS)
+    parser.add_argument('-c', '--connections', type=int, default=CONNECTIONS)
+    parser.add_argument('-r', '--rounds', type=int, default=ROUNDS)
+    args = parser.parse_args()
+    asyncio.run(run(args.sessions, args.connections, args.rounds))
+
+
+if __name__ == '__main__':
+    main()
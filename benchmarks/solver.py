@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import CellContents, Game, GameState  # noqa: E402
+from Solver import Solver, SolveStatus  # noqa: E402
+
+# Solver против полного перебора в ширину по всем допустимым цепочкам на маленьких полях:
+# длина найденного выигрыша должна совпадать с кратчайшей, а NOT_FOUND - означать, что выигрыша нет
+ROW_COUNT, COL_COUNT, MIN_CHAIN_LEN = 7, 4, 3
+MAX_DEPTH = 3
+SEEDS = range(60)
+SHAPES = (CellContents.SQUARE.value, CellContents.CIRCLE.value, CellContents.TRIANGLE.value)
+
+
+def all_chains(game: Game):
+    # все простые пути из одинаковых фигур, по одному на набор клеток
+    rows, cols, buffer = game.row_count, game.col_count, game.board.contents_buffer
+    found = dict()
+
+    def extend(path, cells):
+        if len(path) >= game.min_chain_len:
+            found.setdefault(frozenset(path), list(path))
+        r, c = path[-1]
+        for rc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if game.is_inside(rc) and rc not in cells and buffer[rc[0] * cols + rc[1]] == buffer[r * cols + c]:
+                cells.add(rc)
+                path.append(rc)
+                extend(path, cells)
+                path.pop()
+                cells.discard(rc)
+
+    for r in range(rows):
+        for c in range(cols):
+            if buffer[r * cols + c] in SHAPES:
+                extend([(r, c)], {(r, c)})
+    return list(found.values())
+
+
+def shortest_win(game: Game, max_depth: int):
+    # число ходов кратчайшего выигрыша или None, если за max_depth ходов его нет
+    level = [game]
+    for depth in range(1, max_depth + 1):
+        following, seen = list(), set()
+        for position in level:
+            for chain in all_chains(position):
+                child = position.copy()
+                child.apply_chain(chain)
+                if child.state == GameState.WIN:
+                    return depth
+                key = (bytes(child.board.contents_buffer), child.random.position)
+                if key not in seen:
+                    seen.add(key)
+                    following.append(child)
+        level = following
+    return None
+
+
+def main():
+    solver = Solver(max_depth=MAX_DEPTH)
+    solver_time = brute_time = 0.0
+    for seed in SEEDS:
+        game = Game(ROW_COUNT, COL_COUNT, MIN_CHAIN_LEN, seed)
+        start = time.perf_counter()
+        result = solver.solve(game)
+        solver_time += time.perf_counter() - start
+        start = time.perf_counter()
+        expected = shortest_win(game, MAX_DEPTH)
+        brute_time += time.perf_counter() - start
+        assert result.exact, 'seed {}: search was not exhaustive'.format(seed)
+        assert result.status == (SolveStatus.SOLVED if expected else SolveStatus.NOT_FOUND), \
+            'seed {}: {}, shortest win {}'.format(seed, result, expected)
+        assert result.moves == expected, 'seed {}: {}, shortest win {}'.format(seed, result, expected)
+    print('{}x{}/{}, depth {}, {} boards: solver matches brute force'.format(
+        ROW_COUNT, COL_COUNT, MIN_CHAIN_LEN, MAX_DEPTH, len(SEEDS)))
+    print('  solver {:8.1f} ms, brute force {:8.1f} ms'.format(solver_time * 1000, brute_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
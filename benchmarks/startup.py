@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Время запуска: от начала импорта main до первого нарисованного кадра поля. Каждый замер -
+# отдельный процесс (этот же файл с --child), чтобы импорты и разбор картинок шли с нуля
+RUNS = 7
+REGRESSION = 1.25  # во сколько раз медленнее базового прогона считается регрессией
+
+
+def child() -> None:
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    import main as entry
+    from MainWindow import MainWindow
+    from PyQt5.QtCore import QEvent, QObject, QTimer
+    from PyQt5.QtWidgets import QApplication
+    imported = time.perf_counter()
+    marks, windows = dict(), list()
+
+    def painted():
+        marks['frame'] = time.perf_counter()
+        QApplication.instance().quit()
+
+    class FirstFrame(QObject):
+        def eventFilter(self, obj, e):
+            if e.type() == QEvent.Paint and 'paint' not in marks:
+                marks['paint'] = time.perf_counter()
+                QTimer.singleShot(0, painted)  # сработает, когда кадр уже нарисован
+            return False
+
+    probe = FirstFrame()
+    show = MainWindow.show
+
+    def probed_show(mw):
+        marks['window'] = time.perf_counter()
+        windows.append(mw)
+        mw.tableView.viewport().installEventFilter(probe)
+        show(mw)
+
+    MainWindow.show = probed_show
+    sys.argv = [entry.__file__]
+    main_start = time.perf_counter()
+    try:
+        entry.main()
+    except SystemExit:
+        pass
+    mw = windows[0]
+    mw.board_pool.stop()
+    print(json.dumps({'imports_ms': (imported - start) * 1000, 'window_ms': (marks['window'] - main_start) * 1000,
+                      'main_to_frame_ms': (marks['frame'] - main_start) * 1000,
+                      'total_ms': (marks['frame'] - start) * 1000, 'svgs_loaded': mw._images.loaded}))
+
+
+def measure(runs: int) -> dict:
+    samples = list()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'], capture_output=True,
+                             text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return {name: round(statistics.median(s[name] for s in samples), 2) for name in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время от запуска до первого кадра')
+    parser.add_argument('-n', '--runs', type=int, default=RUNS)
+    parser.add_argument('-o', '--output', metavar='PATH', help='записать медианы в JSON')
+    parser.add_argument('--compare', metavar='PATH', help='сравнить с результатами прошлого прогона')
+    parser.add_argument('--budget', type=float, metavar='MS', help='допустимое время до первого кадра')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    result = measure(args.runs)
+    print('median of {} runs'.format(args.runs))
+    for name, value in result.items():
+        print('  {:<18} {:>8}'.format(name, value))
+    if args.output:
+        with open(args.output, 'w', encoding='UTF-8') as f:
+            json.dump(result, f, indent=1)
+    failed = False
+    if args.compare:
+        with open(args.compare, encoding='UTF-8') as f:
+            baseline = json.load(f)
+        ratio = result['total_ms'] / baseline['total_ms']
+        failed = ratio > REGRESSION
+        print('total vs {}: {:.2f}x{}'.format(args.compare, ratio, '  REGRESSION' if failed else ''))
+    if args.budget is not None and result['total_ms'] > args.budget:
+        print('total {:.1f} ms is over the {:.1f} ms budget'.format(result['total_ms'], args.budget))
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Game import CellContents, Game, GameState  # noqa: E402
+
+# Воспроизводимый набор замеров ядра игры. Все поля строятся из SEED, цепочки
+# прокладываются "змейкой" по строкам между рыцарем и принцессой.
+# Результат - JSON, два таких файла сравниваются через --compare
+SEED = 12345
+SIZES = ((8, 5), (30, 30), (100, 100))
+CHAIN_LENGTHS = (3, 10, 25, 50)
+GUI_CELL_SIZE = 20
+MIN_TIME = 0.2  # секунд на один замер
+MAX_RUNS = 1000
+REGRESSION = 1.10  # во сколько раз медленнее считается регрессией
+
+
+def measure(op, setup=None) -> dict:
+    # op выполняется после setup, время setup не учитывается
+    times, total = list(), 0.0
+    while (total < MIN_TIME or len(times) < 5) and len(times) < MAX_RUNS:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        op()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+    return {'min_us': round(min(times) * 1e6, 2), 'median_us': round(statistics.median(times) * 1e6, 2),
+            'runs': len(times)}
+
+
+def snake(game: Game, length: int):
+    # путь из length клеток по строкам 1..row_count-2, или None, если он не помещается
+    cols, path = game.col_count, list()
+    for r in range(1, game.row_count - 1):
+        row = [(r, c) for c in range(cols)]
+        path.extend(row if r % 2 else row[::-1])
+        if len(path) >= length:
+            return path[:length]
+    return None
+
+
+def lay_chain(game: Game, path) -> None:
+    game.new_game(SEED)
+    for rc in path:
+        game[rc].contents = CellContents.SQUARE
+
+
+def core_benchmarks(row_count: int, col_count: int) -> dict:
+    results = dict()
+    results['game_init'] = measure(lambda: Game(row_count, col_count, 3, SEED))
+    game = Game(row_count, col_count, 3, SEED)
+    results['new_game'] = measure(lambda: game.new_game(SEED))
+    results['random_fill'] = measure(game._random_fill)
+
+    for length in CHAIN_LENGTHS:
+        path = snake(game, length)
+        if path is None:
+            continue
+
+        def drag():
+            game.on_mouse_press(path[0])
+            for rc in path[1:]:
+                game.on_mouse_move(rc)
+
+        result = measure(drag, lambda: lay_chain(game, path))
+        result['per_move_us'] = round(result['min_us'] / length, 3)
+        results['drag_{}'.format(length)] = result
+
+        def select():
+            lay_chain(game, path)
+            drag()
+
+        def collapse():
+            for _ in game.step_down_generator():
+                pass
+            game.update_past_mouse_release()
+
+        results['step_down_{}'.format(length)] = measure(collapse, select)
+
+    # проверка выигрыша после хода: рыцарь над принцессой и рыцарь далеко от неё
+    def win_position():
+        game.new_game(SEED)
+        game._knight, game._princess = (row_count - 2, col_count // 2), (row_count - 1, col_count // 2)
+
+    def check_win():
+        game.update_past_mouse_release()
+        assert game.state == GameState.WIN
+
+    results['win_detection'] = measure(check_win, win_position)
+    game.new_game(SEED)
+    results['no_win_detection'] = measure(game.update_past_mouse_release)
+    return results
+
+
+def gui_benchmarks(app, row_count: int, col_count: int) -> dict:
+    from MainWindow import MainWindow
+
+    mw = MainWindow()
+    mw.board_pool.stop()  # фоновая генерация полей мешает замерам
+    mw.cell_size = GUI_CELL_SIZE
+    mw.game.row_count, mw.game.col_count = row_count, col_count
+    mw._resize_table()
+    mw._new_game()
+    mw.game.new_game(SEED)
+    mw._game_resize(mw.game)
+    mw._hints.cancel()
+    mw.resize(1024, 768)
+    mw.show()
+    app.processEvents()
+    viewport = mw.tableView.viewport()
+    results = dict()
+    results['paint_viewport'] = measure(viewport.repaint)
+
+    cell = (1, 0)
+
+    def touch():
+        mw.game[cell].is_active = not mw.game[cell].is_active
+
+    def update_one():
+        mw._update_view()
+        app.processEvents()
+
+    results['update_view_one_cell'] = measure(update_one, touch)
+
+    def update_all():
+        mw._model.cells_changed(None)
+        app.processEvents()
+
+    results['update_view_all'] = measure(update_all)
+    for name in ('on_item_paint', '_paint_board'):  # делегат на клетку или проход по всему большому полю
+        paint = mw.instruments.histogram(name)
+        if paint.count:
+            results[name] = {'mean_us': round(paint.mean * 1e6, 2), 'calls': paint.count}
+    mw.close()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> int:
+    # печатает отношение времени к базовому прогону, возвращает число регрессий
+    regressions = 0
+    for size, benchmarks in current['results'].items():
+        for name, result in benchmarks.items():
+            base = baseline['results'].get(size, {}).get(name)
+            if base is None or 'min_us' not in result or not base.get('min_us'):
+                continue
+            ratio = result['min_us'] / base['min_us']
+            mark = ''
+            if ratio > REGRESSION:
+                mark, regressions = '  REGRESSION', regressions + 1
+            print('{:>9} {:<24} {:>12.2f} {:>12.2f} {:>7.2f}x{}'.format(
+                size, name, base['min_us'], result['min_us'], ratio, mark))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замеры ядра игры на полях разных размеров')
+    parser.add_argument('-o', '--output', metavar='PATH', help='записать результаты в JSON')
+    parser.add_argument('--compare', metavar='PATH', help='сравнить с результатами прошлого прогона')
+    parser.add_argument('--sizes', default=','.join('{}x{}'.format(*size) for size in SIZES),
+                        help='размеры полей через запятую, например 8x5,30x30')
+    parser.add_argument('--no-gui', action='store_true', help='без замеров отрисовки')
+    args = parser.parse_args()
+
+    sizes = [tuple(int(n) for n in size.split('x')) for size in args.sizes.split(',')]
+    app = None
+    if not args.no_gui:
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication(sys.argv[:1])
+
+    report = {'meta': {'commit': git_commit(), 'seed': SEED, 'python': platform.python_version(),
+                       'platform': platform.platform(), 'qpa': os.environ.get('QT_QPA_PLATFORM'),
+                       'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+              'results': dict()}
+    for row_count, col_count in sizes:
+        key = '{}x{}'.format(row_count, col_count)
+        results = core_benchmarks(row_count, col_count)
+        if app is not None:
+            results.update(gui_benchmarks(app, row_count, col_count))
+        report['results'][key] = results
+        for name, result in results.items():
+            print('{:>9} {:<24} {}'.format(key, name, ', '.join('{} {}'.format(k, v) for k, v in result.items())))
+
+    if args.output:
+        with open(args.output, 'w', encoding='UTF-8') as f:
+            json.dump(report, f, indent=1)
+    if args.compare:
+        with open(args.compare, encoding='UTF-8') as f:
+            baseline = json.load(f)
+        print('\ncompared with {} ({})'.format(args.compare, baseline['meta'].get('commit')))
+        regressions = compare(report, baseline)
+        print('{} regression(s) over {:.0%}'.format(regressions, REGRESSION - 1))
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QEvent, QPointF, Qt, QTimer  # noqa: E402
+from PyQt5.QtGui import QMouseEvent  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from Game import CellContents  # noqa: E402
+from MainWindow import MainWindow  # noqa: E402
+
+HEARTBEAT_MS = 5
+SLEEP_TIME = 0.05
+CHAIN_LEN = 7
+
+
+def mouse_event(mw: MainWindow, kind, rc) -> QMouseEvent:
+    rect = mw.tableView.visualRect(mw.tableView.model().index(*rc))
+    return QMouseEvent(kind, QPointF(rect.center()), Qt.LeftButton, Qt.LeftButton, Qt.NoModifier)
+
+
+def main():
+    app = QApplication(sys.argv)
+    mw = MainWindow()
+    mw.show()
+    mw.sleep_time = SLEEP_TIME
+    game = mw.game
+    game.new_game(seed=1)
+    for r in range(CHAIN_LEN):
+        game[r, 0].contents = CellContents.SQUARE
+    app.processEvents()
+
+    # пульс цикла событий: если интерфейс заблокирован, промежутки между тиками растут
+    ticks = list()
+    heartbeat = QTimer()
+    heartbeat.setInterval(HEARTBEAT_MS)
+    heartbeat.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    heartbeat.start()
+
+    table = mw.tableView
+    table.mousePressEvent(mouse_event(mw, QEvent.MouseButtonPress, (0, 0)))
+    for r in range(1, CHAIN_LEN):
+        table.mouseMoveEvent(mouse_event(mw, QEvent.MouseMove, (r, 0)))
+    start = time.perf_counter()
+    table.mouseReleaseEvent(mouse_event(mw, QEvent.MouseButtonRelease, (CHAIN_LEN - 1, 0)))
+    release_returned = time.perf_counter() - start
+
+    # ввод во время осыпания должен отбрасываться
+    table.mousePressEvent(mouse_event(mw, QEvent.MouseButtonPress, (3, 3)))
+    rejected = len(game.active_cells) == 0
+
+    while mw.is_collapsing:
+        app.processEvents()
+    collapse_time = time.perf_counter() - start
+    for _ in range(5):
+        app.processEvents()
+        time.sleep(HEARTBEAT_MS / 1000)
+    heartbeat.stop()
+
+    gaps = sorted((b - a) * 1000 for a, b in zip(ticks, ticks[1:]))
+    print('release handler returned in {:.2f} ms'.format(release_returned * 1000))
+    print('collapse of {} cells took {:.0f} ms (expected ~{:.0f} ms)'.format(
+        CHAIN_LEN, collapse_time * 1000, SLEEP_TIME * 1000 * CHAIN_LEN))
+    print('input during collapse rejected: {}'.format(rejected))
+    if gaps:
+        print('event loop gaps over {} ticks: median {:.1f} ms, p99 {:.1f} ms, max {:.1f} ms'.format(
+            len(gaps), gaps[len(gaps) // 2], gaps[int(len(gaps) * 0.99)], gaps[-1]))
+
+
+if __name__ == '__main__':
+    main()
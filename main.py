@@ -1,3 +1,4 @@
+import argparse
 import sys
 import traceback
 
@@ -7,8 +8,15 @@ from PyQt5.QtWidgets import QApplication, QMessageBox
 
 
 def main():
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description='Замок с драгоценными камнями')
+    parser.add_argument('--stats', metavar='PATH', help='сохранить статистику интерфейса при выходе')
+    parser.add_argument('--trace', type=int, default=0, metavar='N', help='трассировать каждое N-е событие мыши')
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
     mw = MainWindow()
+    mw.stats_file = args.stats
+    mw.instruments.trace_every = args.trace
 
     def exception_hook(type_, value, tb):
         msg = '\n'.join(traceback.format_exception(type_, value, tb))
@@ -87,6 +87,8 @@ class Ui_MainWindow(object):
         self.menubar.setObjectName("menubar")
         self.menu = QtWidgets.QMenu(self.menubar)
         self.menu.setObjectName("menu")
+        self.move_menu = QtWidgets.QMenu(self.menubar)
+        self.move_menu.setObjectName("move_menu")
         MainWindow.setMenuBar(self.menubar)
         self.statusbar = QtWidgets.QStatusBar(MainWindow)
         self.statusbar.setObjectName("statusbar")
@@ -103,13 +105,32 @@ class Ui_MainWindow(object):
         self.exit.setObjectName("exit")
         self.sleep_menu_item = QtWidgets.QAction(MainWindow)
         self.sleep_menu_item.setObjectName("sleep_menu_item")
+        self.profile_action = QtWidgets.QAction(MainWindow)
+        self.profile_action.setCheckable(True)
+        self.profile_action.setObjectName("profile_action")
+        self.save_stats_action = QtWidgets.QAction(MainWindow)
+        self.save_stats_action.setObjectName("save_stats_action")
+        self.undo_action = QtWidgets.QAction(MainWindow)
+        self.undo_action.setObjectName("undo_action")
+        self.redo_action = QtWidgets.QAction(MainWindow)
+        self.redo_action.setObjectName("redo_action")
+        self.hint_action = QtWidgets.QAction(MainWindow)
+        self.hint_action.setObjectName("hint_action")
         self.menu.addAction(self.game_field_size)
         self.menu.addAction(self.sleep_menu_item)
         self.menu.addSeparator()
+        self.menu.addAction(self.profile_action)
+        self.menu.addAction(self.save_stats_action)
+        self.menu.addSeparator()
         self.menu.addAction(self.game_rule)
         self.menu.addSeparator()
         self.menu.addAction(self.exit)
+        self.move_menu.addAction(self.undo_action)
+        self.move_menu.addAction(self.redo_action)
+        self.move_menu.addSeparator()
+        self.move_menu.addAction(self.hint_action)
         self.menubar.addAction(self.menu.menuAction())
+        self.menubar.addAction(self.move_menu.menuAction())
 
         self.retranslateUi(MainWindow)
         QtCore.QMetaObject.connectSlotsByName(MainWindow)
@@ -119,9 +140,18 @@ class Ui_MainWindow(object):
         MainWindow.setWindowTitle(_translate("MainWindow", "Замок с драгоценными камнями"))
         self.start_game_button.setText(_translate("MainWindow", "Новая игра"))
         self.menu.setTitle(_translate("MainWindow", "Настройки"))
+        self.move_menu.setTitle(_translate("MainWindow", "Ход"))
         self.game_field_size.setText(_translate("MainWindow", "Размер игрового поля"))
         self.character_position.setText(_translate("MainWindow", "Местоположение персонажей"))
         self.action_3.setText(_translate("MainWindow", "Правила игра"))
         self.game_rule.setText(_translate("MainWindow", "Правила игры"))
         self.exit.setText(_translate("MainWindow", "Выход"))
         self.sleep_menu_item.setText(_translate("MainWindow", "Время задержки анимации"))
+        self.profile_action.setText(_translate("MainWindow", "Профилирование"))
+        self.save_stats_action.setText(_translate("MainWindow", "Сохранить статистику..."))
+        self.undo_action.setText(_translate("MainWindow", "Отменить ход"))
+        self.undo_action.setShortcut(_translate("MainWindow", "Ctrl+Z"))
+        self.redo_action.setText(_translate("MainWindow", "Повторить ход"))
+        self.redo_action.setShortcut(_translate("MainWindow", "Ctrl+Y"))
+        self.hint_action.setText(_translate("MainWindow", "Подсказка"))
+        self.hint_action.setShortcut(_translate("MainWindow", "Ctrl+H"))